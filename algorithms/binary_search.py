@@ -35,3 +35,23 @@ def _binary_search_aux(l: list[T], item: T, lo: int, hi: int) -> int:
     elif l[mid] == item:
         return mid
     raise ValueError(f"Comparison operator poorly implemented {item} and {l[mid]} cannot be compared.")
+
+def bisect_right(l: list[T], item: T) -> int:
+    """
+    Find the index just past the last element of l that is <= item.
+
+    :return: The number of elements of l that are less than or equal to item.
+
+    :pre: l is sorted in ascending order.
+    :complexity:
+    Best/Worst Case Complexity: O(log(N) * comp(T)), where N is the length of l.
+    """
+    lo = 0
+    hi = len(l)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if item < l[mid]:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
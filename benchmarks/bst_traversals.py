@@ -0,0 +1,37 @@
+"""
+Compares the BST iterator classes against the generator traversals.
+
+Usage: python -m benchmarks.bst_traversals [--size N]
+"""
+import argparse
+import time
+
+from data_structures.bst import (
+    BinarySearchTree, BSTInOrderIterator, BSTPostOrderIterator, BSTPreOrderIterator,
+    bst_in_order, bst_morris_in_order, bst_post_order, bst_pre_order, bst_reverse_in_order,
+)
+
+
+def time_traversal(name: str, nodes) -> None:
+    start = time.perf_counter()
+    for _ in nodes:
+        pass
+    print(f"{name:<26}{time.perf_counter() - start:>10.2f}s")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--size", type=int, default=10**6, help="Number of nodes in the tree.")
+    args = p.parse_args()
+
+    tree = BinarySearchTree.from_sorted((i, i) for i in range(args.size))
+    root = tree.root
+
+    time_traversal("BSTPreOrderIterator", BSTPreOrderIterator(root))
+    time_traversal("bst_pre_order", bst_pre_order(root))
+    time_traversal("BSTInOrderIterator", BSTInOrderIterator(root))
+    time_traversal("bst_in_order", bst_in_order(root))
+    time_traversal("bst_morris_in_order", bst_morris_in_order(root))
+    time_traversal("bst_reverse_in_order", bst_reverse_in_order(root))
+    time_traversal("BSTPostOrderIterator", BSTPostOrderIterator(root))
+    time_traversal("bst_post_order", bst_post_order(root))
@@ -77,9 +77,11 @@ class ASet(Set[T]):
         i.e. the result set should contains the elements of self and other.
         """
         res = ASet(len(self.array) + len(other.array))
-        for the_set in [self, other]:
-            for i in range(len(the_set)):
-                res.add(the_set.array[i])
+        # The elements of self are already distinct, so they can be block copied.
+        res.array.copy_from(self.array, 0, len(self))
+        res.size = len(self)
+        for i in range(len(other)):
+            res.add(other.array[i])
         return res
 
     def intersection(self, other: ASet[T]) -> ASet[T]:
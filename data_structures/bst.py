@@ -8,9 +8,9 @@ from __future__ import annotations
 __author__ = 'Brendon Taylor, modified by Alexey Ignatiev, further modified by Jackson Goerner'
 __docformat__ = 'reStructuredText'
 
-from typing import TypeVar, Generic
+from typing import Iterable, Iterator, TypeVar, Generic
 from data_structures.linked_stack import LinkedStack
-from data_structures.node import TreeNode
+from data_structures.node import TreeNode, AVLTreeNode
 import sys
 
 
@@ -85,6 +85,49 @@ class BSTInOrderIterator:
         return result
 
 
+class BSTRangeIterator:
+    """ In-order iterator over the nodes whose keys lie between lo and hi (inclusive).
+        Performs stack-based BST traversal, starting from the lower bound.
+    """
+
+    def __init__(self, root: TreeNode[K, I], lo: K, hi: K) -> None:
+        """ Iterator initialiser. Stacks the path to the first key >= lo. """
+
+        self.stack = LinkedStack()
+        self.hi = hi
+        current = root
+        while current:
+            if current.key < lo:
+                current = current.right
+            else:
+                self.stack.push(current)
+                current = current.left
+
+    def __iter__(self) -> BSTRangeIterator:
+        """ Standard __iter__() method for initialisers. Returns itself. """
+
+        return self
+
+    def __next__(self) -> TreeNode[K, I]:
+        """ The main body of the iterator.
+            Returns nodes of the BST one by one in key order, until a key exceeds hi.
+        """
+
+        if self.stack.is_empty():
+            raise StopIteration
+        result = self.stack.pop()
+        if result.key > self.hi:
+            self.stack.clear()
+            raise StopIteration
+
+        current = result.right
+        while current:
+            self.stack.push(current)
+            current = current.left
+
+        return result
+
+
 class BSTPostOrderIterator:
     """ Post-order iterator for the binary search tree.
         Performs stack-based BST traversal.
@@ -120,6 +163,115 @@ class BSTPostOrderIterator:
                     self.stack.push((current.left, False))
 
 
+def bst_pre_order(root: TreeNode[K, I]) -> Iterator[TreeNode[K, I]]:
+    """ Pre-order generator. The stack is a Python list, so no node is allocated per push.
+        :complexity: O(N) in total, O(D) extra space where D is the depth of the tree
+    """
+    stack = [root] if root is not None else []
+    while stack:
+        current = stack.pop()
+        yield current
+        if current.right is not None:
+            stack.append(current.right)
+        if current.left is not None:
+            stack.append(current.left)
+
+
+def bst_in_order(root: TreeNode[K, I]) -> Iterator[TreeNode[K, I]]:
+    """ In-order (ascending key) generator using a Python list as the stack.
+        :complexity: O(N) in total, O(D) extra space where D is the depth of the tree
+    """
+    stack = []
+    current = root
+    while True:
+        while current is not None:
+            stack.append(current)
+            current = current.left
+        if not stack:
+            return
+        current = stack.pop()
+        yield current
+        current = current.right
+
+
+def bst_reverse_in_order(root: TreeNode[K, I]) -> Iterator[TreeNode[K, I]]:
+    """ Descending key generator, i.e. in-order with the children swapped.
+        :complexity: O(N) in total, O(D) extra space where D is the depth of the tree
+    """
+    stack = []
+    current = root
+    while True:
+        while current is not None:
+            stack.append(current)
+            current = current.right
+        if not stack:
+            return
+        current = stack.pop()
+        yield current
+        current = current.left
+
+
+def bst_post_order(root: TreeNode[K, I]) -> Iterator[TreeNode[K, I]]:
+    """ Post-order generator. Remembers the last node yielded instead of pushing
+        (node, expanded) tuples, to tell whether a right subtree is already done.
+        :complexity: O(N) in total, O(D) extra space where D is the depth of the tree
+    """
+    stack = []
+    last = None
+    current = root
+    while True:
+        while current is not None:
+            stack.append(current)
+            current = current.left
+        if not stack:
+            return
+        top = stack[-1]
+        if top.right is not None and top.right is not last:
+            current = top.right
+        else:
+            last = stack.pop()
+            yield last
+
+
+def _morris_walk(root: TreeNode[K, I]) -> Iterator[TreeNode[K, I]]:
+    """ Morris in-order traversal. See bst_morris_in_order. """
+    current = root
+    while current is not None:
+        if current.left is None:
+            yield current
+            current = current.right
+            continue
+        predecessor = current.left
+        while predecessor.right is not None and predecessor.right is not current:
+            predecessor = predecessor.right
+        if predecessor.right is None:
+            # Thread the predecessor back to current, then do the left subtree.
+            predecessor.right = current
+            current = current.left
+        else:
+            # Back from the left subtree through the thread, so remove it.
+            predecessor.right = None
+            yield current
+            current = current.right
+
+
+def bst_morris_in_order(root: TreeNode[K, I]) -> Iterator[TreeNode[K, I]]:
+    """ In-order generator using O(1) extra space.
+        While it runs, some right pointers are temporarily threaded back to an
+        ancestor, so the tree must not be read or changed by anything else until
+        the traversal ends. If the generator is closed early, the rest of the walk
+        is done without yielding so that every thread is removed.
+        :complexity: O(N) in total, O(1) extra space
+    """
+    walk = _morris_walk(root)
+    try:
+        for current in walk:
+            yield current
+    finally:
+        for _ in walk:
+            pass
+
+
 class BinarySearchTree(Generic[K, I]):
     """ Basic binary search tree. """
 
@@ -131,6 +283,41 @@ class BinarySearchTree(Generic[K, I]):
 
         self.root = None
         self.length = 0
+        # Bumped by every __setitem__/__delitem__, see snapshot.
+        self.version = 0
+        # (version, pairs), replaced as a whole so readers never see a torn cache.
+        self._snapshot = (-1, None)
+
+    @classmethod
+    def from_sorted(cls, pairs: Iterable[tuple[K, I]]) -> BinarySearchTree[K, I]:
+        """
+            Builds a perfectly balanced tree from (key, item) pairs sorted by key,
+            always making the middle pair of a range the root of its subtree.
+            :complexity: O(N * CompK) where N is the number of pairs
+            :raises ValueError: if the keys are not strictly increasing
+        """
+        pairs = list(pairs)
+        for i in range(1, len(pairs)):
+            if not pairs[i - 1][0] < pairs[i][0]:
+                raise ValueError('Keys are not sorted and unique')
+        tree = cls()
+        tree.root = tree._build_balanced(pairs, 0, len(pairs))
+        tree.length = len(pairs)
+        return tree
+
+    def _build_balanced(self, pairs: list[tuple[K, I]], lo: int, hi: int) -> TreeNode:
+        """
+            Builds a balanced subtree out of pairs[lo:hi] and returns its root.
+            :complexity: O(hi - lo)
+        """
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        current = TreeNode(pairs[mid][0], pairs[mid][1])
+        current.left = self._build_balanced(pairs, lo, mid)
+        current.right = self._build_balanced(pairs, mid + 1, hi)
+        self.update_size(current)
+        return current
 
     def is_empty(self) -> bool:
         """
@@ -160,6 +347,10 @@ class BinarySearchTree(Generic[K, I]):
         """ Create an in-order iterator. """
         return BSTInOrderIterator(self.root)
 
+    def __reversed__(self) -> Iterator[TreeNode[K, I]]:
+        """ Create a descending key order iterator. """
+        return bst_reverse_in_order(self.root)
+
     def __getitem__(self, key: K) -> I:
         """
             Attempts to get an item in the tree, it uses the Key to attempt to find it
@@ -173,71 +364,230 @@ class BinarySearchTree(Generic[K, I]):
         return self.get_tree_node_by_key_aux(self.root, key)
 
     def get_tree_node_by_key_aux(self, current: TreeNode, key: K) -> TreeNode:
-        if current is None:  # base case: empty
-            raise KeyError('Key not found: {0}'.format(key))
-        elif key == current.key:  # base case: found
-            return current
-        elif key < current.key:
-            return self.get_tree_node_by_key_aux(current.left, key)
-        else:  # key > current.key
-            return self.get_tree_node_by_key_aux(current.right, key)
+        """
+            Walks down from current until the node with the given key is found.
+            :complexity best: O(CompK) the key is at current
+            :complexity worst: O(CompK * D) key is not found, where D is the depth of the tree
+        """
+        while current is not None:
+            if key == current.key:
+                return current
+            elif key < current.key:
+                current = current.left
+            else:  # key > current.key
+                current = current.right
+        raise KeyError('Key not found: {0}'.format(key))
 
     def __setitem__(self, key: K, item: I) -> None:
         self.root = self.insert_aux(self.root, key, item)
+        self.version += 1
 
     def insert_aux(self, current: TreeNode, key: K, item: I) -> TreeNode:
         """
-            Attempts to insert an item into the tree, it uses the Key to insert it
+            Attempts to insert an item into the tree, it uses the Key to insert it.
+            Returns the (possibly new) root of the subtree rooted at current.
             :complexity best: O(CompK) inserts the item at the root.
             :complexity worst: O(CompK * D) inserting at the bottom of the tree
             where D is the depth of the tree
             CompK is the complexity of comparing the keys
         """
-        if current is None:  # base case: at the leaf
-            current = TreeNode(key, item)
+        if current is None:  # empty subtree
             self.length += 1
-        elif key < current.key:
-            current.left = self.insert_aux(current.left, key, item)
-        elif key > current.key:
-            current.right = self.insert_aux(current.right, key, item)
-        else:  # key == current.key
-            raise ValueError('Inserting duplicate item')
+            return TreeNode(key, item)
+
+        parent = current
+        while True:
+            parent.size += 1
+            if key < parent.key:
+                if parent.left is None:
+                    parent.left = TreeNode(key, item)
+                    break
+                parent = parent.left
+            elif key > parent.key:
+                if parent.right is None:
+                    parent.right = TreeNode(key, item)
+                    break
+                parent = parent.right
+            else:  # key == parent.key
+                parent.size -= 1
+                self._adjust_sizes(current, key, -1)
+                raise ValueError('Inserting duplicate item')
+        self.length += 1
         return current
 
     def __delitem__(self, key: K) -> None:
         self.root = self.delete_aux(self.root, key)
+        self.version += 1
+
+    def snapshot(self) -> list[tuple[K, I]]:
+        """
+            Returns the (key, item) pairs of the tree in key order, as a flat list.
+            The list is cached until the next __setitem__/__delitem__, so repeated
+            scans of an unchanged tree do not walk it again. Callers must not modify it.
+            :complexity: O(1) if the tree is unchanged since the last call, otherwise O(N)
+        """
+        # The root is updated before the version, so reading them in this order can
+        # only cache a newer tree under an older version, which is just rebuilt later.
+        version = self.version
+        root = self.root
+        cached_version, pairs = self._snapshot
+        if cached_version != version:
+            pairs = [(node.key, node.item) for node in bst_in_order(root)]
+            self._snapshot = (version, pairs)
+        return pairs
 
     def delete_aux(self, current: TreeNode, key: K) -> TreeNode:
         """
             Attempts to delete an item from the tree, it uses the Key to
             determine the node to delete.
+            Returns the (possibly new) root of the subtree rooted at current.
+            :complexity best: O(CompK) deleting a root with at most one child
+            :complexity worst: O(CompK * D) where D is the depth of the tree
         """
-
-        if current is None:  # key not found
+        parent = None
+        node = current
+        while node is not None and key != node.key:
+            node.size -= 1
+            parent = node
+            node = node.left if key < node.key else node.right
+
+        if node is None:  # key not found
+            self._adjust_sizes(current, key, 1)
             raise ValueError('Deleting non-existent item')
-        elif key < current.key:
-            current.left  = self.delete_aux(current.left, key)
-        elif key > current.key:
-            current.right = self.delete_aux(current.right, key)
-        else:  # we found our key => do actual deletion
-            if self.is_leaf(current):
-                self.length -= 1
-                return None
-            elif current.left is None:
-                self.length -= 1
-                return current.right
-            elif current.right is None:
-                self.length -= 1
-                return current.left
 
-            # general case => find a successor
-            succ = self.get_successor(current)
-            current.key  = succ.key
-            current.item = succ.item
-            current.right = self.delete_aux(current.right, succ.key)
+        if node.left is not None and node.right is not None:
+            # general case => move the successor up and unlink it instead
+            node.size -= 1
+            succ_parent = node
+            succ = node.right
+            while succ.left is not None:
+                succ.size -= 1
+                succ_parent = succ
+                succ = succ.left
+            node.key = succ.key
+            node.item = succ.item
+            if succ_parent is node:
+                succ_parent.right = succ.right
+            else:
+                succ_parent.left = succ.right
+            self.length -= 1
+            return current
 
+        child = node.left if node.left is not None else node.right
+        self.length -= 1
+        if parent is None:
+            return child
+        if parent.left is node:
+            parent.left = child
+        else:
+            parent.right = child
         return current
 
+    def _adjust_sizes(self, current: TreeNode, key: K, delta: int) -> None:
+        """
+            Adds delta to the size of every node on the search path for key,
+            stopping before the node holding key. Used to undo a failed update.
+            :complexity: O(CompK * D) where D is the depth of the tree
+        """
+        while current is not None and key != current.key:
+            current.size += delta
+            current = current.left if key < current.key else current.right
+
+    def get_size(self, current: TreeNode) -> int:
+        """
+            Get the number of nodes in the subtree rooted at current. Return 0 if current is None.
+            :complexity: O(1)
+        """
+        if current is None:
+            return 0
+        return current.size
+
+    def update_size(self, current: TreeNode) -> None:
+        """
+            Recompute the size of a node from the sizes of its children.
+            :complexity: O(1)
+        """
+        current.size = 1 + self.get_size(current.left) + self.get_size(current.right)
+
+    def kth(self, k: int) -> TreeNode:
+        """
+            Get the node with the k-th smallest key, counting from 0.
+            :complexity: O(D) where D is the depth of the tree
+            :raises IndexError: if k is not between 0 and len(self) - 1
+        """
+        if not 0 <= k < self.length:
+            raise IndexError('Index out of range: {0}'.format(k))
+        current = self.root
+        while True:
+            left_size = self.get_size(current.left)
+            if k < left_size:
+                current = current.left
+            elif k == left_size:
+                return current
+            else:
+                k -= left_size + 1
+                current = current.right
+
+    def rank(self, key: K) -> int:
+        """
+            Get the number of keys in the tree smaller than key. key does not have to be in the tree.
+            :complexity: O(CompK * D) where D is the depth of the tree
+        """
+        rank = 0
+        current = self.root
+        while current is not None:
+            if key < current.key:
+                current = current.left
+            elif key > current.key:
+                rank += self.get_size(current.left) + 1
+                current = current.right
+            else:
+                return rank + self.get_size(current.left)
+        return rank
+
+    def floor(self, key: K) -> TreeNode:
+        """
+            Get the node with the largest key smaller than or equal to key.
+            If no such node exists, then None is returned.
+            :complexity: O(CompK * D) where D is the depth of the tree
+        """
+        best = None
+        current = self.root
+        while current is not None:
+            if key < current.key:
+                current = current.left
+            elif key > current.key:
+                best = current
+                current = current.right
+            else:
+                return current
+        return best
+
+    def ceiling(self, key: K) -> TreeNode:
+        """
+            Get the node with the smallest key larger than or equal to key.
+            If no such node exists, then None is returned.
+            :complexity: O(CompK * D) where D is the depth of the tree
+        """
+        best = None
+        current = self.root
+        while current is not None:
+            if key > current.key:
+                current = current.right
+            elif key < current.key:
+                best = current
+                current = current.left
+            else:
+                return current
+        return best
+
+    def range(self, lo: K, hi: K) -> BSTRangeIterator:
+        """
+            Create an in-order iterator over the nodes with lo <= key <= hi.
+            :complexity: O(CompK * D) to find the first node, then O(1) amortised per node
+        """
+        return BSTRangeIterator(self.root, lo, hi)
+
     def get_successor(self, current: TreeNode) -> TreeNode:
         """
             Get successor of the current node.
@@ -252,12 +602,13 @@ class BinarySearchTree(Generic[K, I]):
     def get_minimal(self, current: TreeNode) -> TreeNode:
         """
             Get a node having the smallest key in the current sub-tree.
+            :complexity: O(D) where D is the depth of the sub-tree
         """
         if current is None:
             return None
-        if current.left is None:
-            return current
-        return self.get_minimal(current.left)
+        while current.left is not None:
+            current = current.left
+        return current
 
     def is_leaf(self, current: TreeNode) -> bool:
         """ Simple check whether or not the node is a leaf. """
@@ -284,6 +635,314 @@ class BinarySearchTree(Generic[K, I]):
             real_prefix = prefix[:-2] + final
             print('{0}'.format(real_prefix), file=to)
 
+class AVLTree(BinarySearchTree[K, I]):
+    """ Self-balancing binary search tree.
+
+        Keeps the heights of the two subtrees of every node within one of each other,
+        so the depth of the tree is O(log N) regardless of the insertion order.
+    """
+
+    def get_height(self, current: AVLTreeNode) -> int:
+        """
+            Get the height of a node. Return 0 if current is None.
+            :complexity: O(1)
+        """
+        if current is None:
+            return 0
+        return current.height
+
+    def get_balance(self, current: AVLTreeNode) -> int:
+        """
+            Compute the balance factor (left height - right height) of the current node.
+            :complexity: O(1)
+        """
+        if current is None:
+            return 0
+        return self.get_height(current.left) - self.get_height(current.right)
+
+    def update_height(self, current: AVLTreeNode) -> None:
+        """
+            Recompute the height of a node from the heights of its children.
+            :complexity: O(1)
+        """
+        current.height = 1 + max(self.get_height(current.left), self.get_height(current.right))
+
+    def _build_balanced(self, pairs: list[tuple[K, I]], lo: int, hi: int) -> AVLTreeNode:
+        """
+            Builds a balanced subtree of AVLTreeNodes out of pairs[lo:hi] and returns its root.
+            :complexity: O(hi - lo)
+        """
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        current = AVLTreeNode(pairs[mid][0], pairs[mid][1])
+        current.left = self._build_balanced(pairs, lo, mid)
+        current.right = self._build_balanced(pairs, mid + 1, hi)
+        self.update_height(current)
+        self.update_size(current)
+        return current
+
+    def insert_aux(self, current: AVLTreeNode, key: K, item: I) -> AVLTreeNode:
+        """
+            Attempts to insert an item into the tree, rebalancing on the way back up.
+            :complexity best: O(CompK) inserts the item at the root.
+            :complexity worst: O(CompK * log(N)) inserting at the bottom of the tree
+            where N is the number of nodes in the tree
+            CompK is the complexity of comparing the keys
+        """
+        if current is None:  # base case: at the leaf
+            self.length += 1
+            return AVLTreeNode(key, item)
+        elif key < current.key:
+            current.left = self.insert_aux(current.left, key, item)
+        elif key > current.key:
+            current.right = self.insert_aux(current.right, key, item)
+        else:  # key == current.key
+            raise ValueError('Inserting duplicate item')
+        return self.rebalance(current)
+
+    def delete_aux(self, current: AVLTreeNode, key: K) -> AVLTreeNode:
+        """
+            Attempts to delete an item from the tree, rebalancing on the way back up.
+            :complexity: O(CompK * log(N)) where N is the number of nodes in the tree
+        """
+        if current is None:  # key not found
+            raise ValueError('Deleting non-existent item')
+        elif key < current.key:
+            current.left = self.delete_aux(current.left, key)
+        elif key > current.key:
+            current.right = self.delete_aux(current.right, key)
+        else:  # we found our key => do actual deletion
+            if current.left is None:
+                self.length -= 1
+                return current.right
+            elif current.right is None:
+                self.length -= 1
+                return current.left
+
+            # general case => find a successor
+            succ = self.get_successor(current)
+            current.key = succ.key
+            current.item = succ.item
+            current.right = self.delete_aux(current.right, succ.key)
+
+        return self.rebalance(current)
+
+    def left_rotate(self, current: AVLTreeNode) -> AVLTreeNode:
+        """
+            Perform left rotation of the sub-tree.
+            Right child of the current node, i.e. of the root of the target
+            sub-tree, should become the new root of the sub-tree.
+            returns the new root of the subtree.
+            Example:
+
+                 current                                       child
+                /       \\                                      /   \\
+            l-tree     child           -------->        current     r-tree
+                      /     \\                           /     \\
+                 center     r-tree                 l-tree     center
+
+            :complexity: O(1)
+        """
+        child = current.right
+        current.right = child.left
+        child.left = current
+        self.update_height(current)
+        self.update_size(current)
+        self.update_height(child)
+        self.update_size(child)
+        return child
+
+    def right_rotate(self, current: AVLTreeNode) -> AVLTreeNode:
+        """
+            Perform right rotation of the sub-tree.
+            Left child of the current node, i.e. of the root of the target
+            sub-tree, should become the new root of the sub-tree.
+            returns the new root of the subtree.
+            Example:
+
+                       current                                child
+                      /       \\                              /     \\
+                  child       r-tree     --------->     l-tree     current
+                 /     \\                                           /     \\
+            l-tree     center                                 center     r-tree
+
+            :complexity: O(1)
+        """
+        child = current.left
+        current.left = child.right
+        child.right = current
+        self.update_height(current)
+        self.update_size(current)
+        self.update_height(child)
+        self.update_size(child)
+        return child
+
+    def rebalance(self, current: AVLTreeNode) -> AVLTreeNode:
+        """
+            Compute the balance of the current node and rotate it back into balance
+            if needed. Returns the new root of the subtree.
+            :complexity: O(1)
+        """
+        self.update_height(current)
+        self.update_size(current)
+        balance = self.get_balance(current)
+        if balance >= 2:
+            if self.get_balance(current.left) < 0:
+                current.left = self.left_rotate(current.left)
+            return self.right_rotate(current)
+        if balance <= -2:
+            if self.get_balance(current.right) > 0:
+                current.right = self.right_rotate(current.right)
+            return self.left_rotate(current)
+        return current
+
+
+class PersistentAVLTree(AVLTree[K, I]):
+    """ AVL tree whose nodes are never changed once they are part of a tree.
+
+        Inserts and deletes copy the nodes on the path they change (and the nodes they
+        rotate) and share every other subtree, so they cost O(log N) new nodes and leave
+        any root taken earlier describing exactly the tree it described before.
+        A reader can therefore pin a version in O(1) with pin(), and with_item and
+        without build new versions while leaving this one untouched.
+    """
+
+    def _copy(self, current: AVLTreeNode) -> AVLTreeNode:
+        """
+            Returns a new node with the same contents as current.
+            :complexity: O(1)
+        """
+        node = AVLTreeNode(current.key, current.item)
+        node.left = current.left
+        node.right = current.right
+        node.height = current.height
+        node.size = current.size
+        return node
+
+    def pin(self) -> PersistentAVLTree[K, I]:
+        """
+            Returns a tree for the current version. Later changes to this tree do not affect it.
+            :complexity: O(1)
+        """
+        tree = PersistentAVLTree()
+        tree.root = root = self.root
+        tree.length = self.get_size(root)
+        return tree
+
+    def with_item(self, key: K, item: I) -> PersistentAVLTree[K, I]:
+        """
+            Returns a new version mapping key to item, inserting the key or replacing its item.
+            :complexity: O(CompK * log(N)) where N is the number of nodes in the tree
+        """
+        tree = self.pin()
+        if key in tree:
+            tree.root = tree._replace_aux(tree.root, key, item)
+        else:
+            tree[key] = item
+        return tree
+
+    def without(self, key: K) -> PersistentAVLTree[K, I]:
+        """
+            Returns a new version without key.
+            :complexity: O(CompK * log(N)) where N is the number of nodes in the tree
+            :raises ValueError: if the key is not in the tree
+        """
+        tree = self.pin()
+        del tree[key]
+        return tree
+
+    def _replace_aux(self, current: AVLTreeNode, key: K, item: I) -> AVLTreeNode:
+        """
+            Copies the path to key, replacing the item of its node.
+            :pre: key is in the subtree rooted at current
+            :complexity: O(CompK * log(N)) where N is the number of nodes in the tree
+        """
+        if key == current.key:
+            current = self._copy(current)
+            current.item = item
+        elif key < current.key:
+            left = self._replace_aux(current.left, key, item)
+            current = self._copy(current)
+            current.left = left
+        else:
+            right = self._replace_aux(current.right, key, item)
+            current = self._copy(current)
+            current.right = right
+        return current
+
+    def insert_aux(self, current: AVLTreeNode, key: K, item: I) -> AVLTreeNode:
+        """
+            Inserts by copying the path to the new leaf, returning the new root.
+            :complexity: O(CompK * log(N)) where N is the number of nodes in the tree
+        """
+        if current is None:  # base case: at the leaf
+            self.length += 1
+            return AVLTreeNode(key, item)
+        elif key < current.key:
+            left = self.insert_aux(current.left, key, item)
+            current = self._copy(current)
+            current.left = left
+        elif key > current.key:
+            right = self.insert_aux(current.right, key, item)
+            current = self._copy(current)
+            current.right = right
+        else:  # key == current.key
+            raise ValueError('Inserting duplicate item')
+        return self.rebalance(current)
+
+    def delete_aux(self, current: AVLTreeNode, key: K) -> AVLTreeNode:
+        """
+            Deletes by copying the path to the deleted node, returning the new root.
+            :complexity: O(CompK * log(N)) where N is the number of nodes in the tree
+        """
+        if current is None:  # key not found
+            raise ValueError('Deleting non-existent item')
+        elif key < current.key:
+            left = self.delete_aux(current.left, key)
+            current = self._copy(current)
+            current.left = left
+        elif key > current.key:
+            right = self.delete_aux(current.right, key)
+            current = self._copy(current)
+            current.right = right
+        else:  # we found our key => do actual deletion
+            if current.left is None:
+                self.length -= 1
+                return current.right
+            elif current.right is None:
+                self.length -= 1
+                return current.left
+
+            # general case => find a successor
+            succ = self.get_successor(current)
+            right = self.delete_aux(current.right, succ.key)
+            current = self._copy(current)
+            current.key = succ.key
+            current.item = succ.item
+            current.right = right
+
+        return self.rebalance(current)
+
+    def left_rotate(self, current: AVLTreeNode) -> AVLTreeNode:
+        """
+            Left rotation on copies of current and its right child, see AVLTree.left_rotate.
+            :complexity: O(1)
+        """
+        current = self._copy(current)
+        current.right = self._copy(current.right)
+        return super().left_rotate(current)
+
+    def right_rotate(self, current: AVLTreeNode) -> AVLTreeNode:
+        """
+            Right rotation on copies of current and its left child, see AVLTree.right_rotate.
+            :complexity: O(1)
+        """
+        current = self._copy(current)
+        current.left = self._copy(current.left)
+        return super().right_rotate(current)
+
+
 if __name__ == "__main__":
     bst = BinarySearchTree()
     bst[5] = "M"
@@ -7,7 +7,7 @@ __author__ = 'Jackson Goerner'
 __since__ = '07/02/2023'
 
 
-from typing import TypeVar, Generic
+from typing import Callable, TypeVar, Generic
 from data_structures.referential_array import ArrayR
 
 K = TypeVar('K')
@@ -17,36 +17,111 @@ class FullError(Exception):
     pass
 
 
+# Marks a slot whose entry was deleted, so probes continue past it.
+TOMBSTONE = object()
+
+
+def next_prime(n: int) -> int:
+    """
+    Returns the smallest prime that is at least n.
+
+    :complexity: O(G * sqrt(n)) where G is the gap to the next prime.
+    """
+    candidate = max(n, 2)
+    while True:
+        divisor = 2
+        while divisor * divisor <= candidate:
+            if candidate % divisor == 0:
+                break
+            divisor += 1
+        else:
+            return candidate
+        candidate += 1
+
+
 class LinearProbeTable(Generic[K, V]):
     """
     Linear Probe Table.
 
     Type Arguments:
-        - K:    Key Type. In most cases should be string.
-                Otherwise `hash` should be overwritten.
+        - K:    Key Type. Should be string for the "universal" and "fnv1a" hash functions.
+                Otherwise pick "builtin", pass a callable, or overwrite `full_hash` or `hash`.
         - V:    Value Type.
 
     Unless stated otherwise, all methods have O(1) complexity.
     """
 
-    # No test case should exceed 1 million entries.
+    # Built-in sizes. Larger primes are generated on demand, see _table_size_at.
     TABLE_SIZES = [5, 13, 29, 53, 97, 193, 389, 769, 1543, 3079, 6151, 12289, 24593, 49157, 98317, 196613, 393241, 786433, 1572869]
 
     HASH_BASE = 31
+    # Mersenne prime the full hash is taken modulo before it is reduced to a position.
+    HASH_MODULUS = 2**61 - 1
 
-    def __init__(self, sizes=None) -> None:
+    FNV_OFFSET_BASIS = 0xcbf29ce484222325
+    FNV_PRIME = 0x100000001b3
+
+    # The table shrinks when fewer than this fraction of max_load_factor is in use.
+    SHRINK_RATIO = 0.25
+
+    def __init__(self, sizes=None, use_tombstones: bool = False, max_load_factor: float = 0.5,
+                 hash_function: str | Callable[[K], int] = "universal") -> None:
         """
         Initialise the Hash Table.
+
+        If use_tombstones is True, deleted entries are replaced by TOMBSTONE rather than
+        repairing the rest of their cluster, and tombstones are cleared on the next rehash.
+        The table grows once more than max_load_factor of its slots are in use.
+
+        hash_function picks how keys are hashed:
+            - "universal": polynomial string hash with a varying multiplier (str keys).
+            - "fnv1a":     64-bit FNV-1a over the UTF-8 bytes of the key (str or bytes keys).
+            - "builtin":   Python's hash(), for any hashable key such as tuples.
+            - a callable taking a key and returning an int, e.g. for Island keys.
+
+        :raises ValueError: if max_load_factor is not strictly between 0 and 1,
+                            or hash_function is not one of the above.
         """
-        if sizes is not None:
-            self.TABLE_SIZES = sizes
+        if not 0 < max_load_factor < 1:
+            raise ValueError("max_load_factor should be strictly between 0 and 1.")
+        if callable(hash_function):
+            self.hash_function = hash_function
+        elif hash_function == "universal":
+            self.hash_function = self.universal_hash
+        elif hash_function == "fnv1a":
+            self.hash_function = self.fnv1a_hash
+        elif hash_function == "builtin":
+            self.hash_function = hash
+        else:
+            raise ValueError("Unknown hash function: {0}".format(hash_function))
+        # Copied, since sizes past the end of the list are appended to it.
+        self.TABLE_SIZES = list(self.TABLE_SIZES if sizes is None else sizes)
+        self.max_load_factor = max_load_factor
         self.size_index = 0
-        self.array:ArrayR[tuple[K, V]] = ArrayR(self.TABLE_SIZES[self.size_index])
+        # Entries are (key, value, full_hash) so the hash never has to be recomputed.
+        self.array:ArrayR[tuple[K, V, int]] = ArrayR(self.TABLE_SIZES[self.size_index])
         self.count = 0
+        self.use_tombstones = use_tombstones
+        self.tombstone_count = 0
+        # A subclass overriding hash gets positions for the current table size only,
+        # so its entries are rehashed on every resize. See hash.
+        self.size_dependent_hash = type(self).hash is not LinearProbeTable.hash
 
-    def hash(self, key: K) -> int:
+    def full_hash(self, key: K) -> int:
         """
-        Hash a key for insert/retrieve/update into the hashtable.
+        Hash a key independently of the table size, using the table's hash function.
+        The result is stored with each entry, so resizing only has to reduce it modulo
+        the new table size. If hash is overridden, this is hash(key) instead.
+
+        :complexity: O(hash_function(key))
+        """
+        if self.size_dependent_hash:
+            return self.hash(key)
+        return self.hash_function(key) % self.HASH_MODULUS
+
+    def universal_hash(self, key: str) -> int:
+        """
+        Polynomial string hash with a multiplier that changes for every character.
 
         :complexity: O(len(key))
         """
@@ -54,10 +129,36 @@ class LinearProbeTable(Generic[K, V]):
         value = 0
         a = 31415
         for char in key:
-            value = (ord(char) + a * value) % self.table_size
-            a = a * self.HASH_BASE % (self.table_size - 1)
+            value = (ord(char) + a * value) % self.HASH_MODULUS
+            a = a * self.HASH_BASE % (self.HASH_MODULUS - 1)
         return value
 
+    def fnv1a_hash(self, key: str | bytes) -> int:
+        """
+        64-bit FNV-1a hash of the UTF-8 encoding of the key.
+
+        :complexity: O(len(key))
+        """
+        if isinstance(key, str):
+            key = key.encode()
+        value = self.FNV_OFFSET_BASIS
+        for byte in key:
+            value = ((value ^ byte) * self.FNV_PRIME) & 0xffffffffffffffff
+        return value
+
+    def hash(self, key: K) -> int:
+        """
+        Hash a key for insert/retrieve/update into the hashtable.
+
+        Subclasses may override this to place keys themselves, returning a position
+        between 0 and self.table_size - 1. The table then stores that position instead
+        of a full hash, and calls hash again for every entry when it is resized.
+        Overriding full_hash or passing hash_function avoids that rehashing.
+
+        :complexity: O(hash_function(key))
+        """
+        return self.hash_function(key) % self.HASH_MODULUS % self.table_size
+
     @property
     def table_size(self) -> int:
         return len(self.array)
@@ -68,32 +169,44 @@ class LinearProbeTable(Generic[K, V]):
         """
         return self.count
 
-    def _linear_probe(self, key: K, is_insert: bool) -> int:
+    def _linear_probe(self, key: K, is_insert: bool, key_hash: int = None) -> int:
         """
         Find the correct position for this key in the hash table using linear probing.
+        Entries whose stored hash differs from key_hash are skipped without comparing keys.
+        key_hash is computed from key if it is not given.
+        Tombstones are probed past, but an insert of a new key reuses the first one seen.
         :complexity best: O(hash(key)) first position is empty
         :complexity worst: O(hash(key) + N*comp(K)) when we've searched the entire table
                         where N is the tablesize
         :raises KeyError: When the key is not in the table, but is_insert is False.
         :raises FullError: When a table is full and cannot be inserted.
         """
+        if key_hash is None:
+            key_hash = self.full_hash(key)
         # Initial position
-        position = self.hash(key)
+        position = key_hash % self.table_size
+
+        first_tombstone = None
 
         for _ in range(self.table_size):
-            if self.array[position] is None:
+            entry = self.array[position]
+            if entry is None:
                 # Empty spot. Am I upserting or retrieving?
                 if is_insert:
-                    return position
+                    return position if first_tombstone is None else first_tombstone
                 else:
                     raise KeyError(key)
-            elif self.array[position][0] == key:
+            elif entry is TOMBSTONE:
+                if first_tombstone is None:
+                    first_tombstone = position
+            elif entry[2] == key_hash and entry[0] == key:
                 return position
-            else:
-                # Taken by something else. Time to linear probe.
-                position = (position + 1) % self.table_size
+            # Taken by something else. Time to linear probe.
+            position = (position + 1) % self.table_size
 
-        if is_insert:
+        if is_insert and first_tombstone is not None:
+            return first_tombstone
+        elif is_insert:
             raise FullError("Table is full!")
         else:
             raise KeyError(key)
@@ -105,9 +218,9 @@ class LinearProbeTable(Generic[K, V]):
         :complexity: O(N) where N is self.table_size.
         """
         res = []
-        for x in range(self.table_size):
-            if self.array[x] is not None:
-                res.append(self.array[x][0])
+        for entry in self.array:
+            if entry is not None and entry is not TOMBSTONE:
+                res.append(entry[0])
         return res
 
     def values(self) -> list[V]:
@@ -117,9 +230,9 @@ class LinearProbeTable(Generic[K, V]):
         :complexity: O(N) where N is self.table_size.
         """
         res = []
-        for x in range(self.table_size):
-            if self.array[x] is not None:
-                res.append(self.array[x][1])
+        for entry in self.array:
+            if entry is not None and entry is not TOMBSTONE:
+                res.append(entry[1])
         return res
 
     def __contains__(self, key: K) -> bool:
@@ -153,14 +266,19 @@ class LinearProbeTable(Generic[K, V]):
         :raises FullError: when the table cannot be resized further.
         """
 
-        position = self._linear_probe(key, True)
+        key_hash = self.full_hash(key)
+        position = self._linear_probe(key, True, key_hash)
 
         if self.array[position] is None:
             self.count += 1
+        elif self.array[position] is TOMBSTONE:
+            self.count += 1
+            self.tombstone_count -= 1
 
-        self.array[position] = (key, data)
+        self.array[position] = (key, data, key_hash)
 
-        if len(self) > self.table_size / 2:
+        # Tombstones lengthen probes just like live entries do.
+        if len(self) + self.tombstone_count > self.table_size * self.max_load_factor:
             self._rehash()
 
     def __delitem__(self, key: K) -> None:
@@ -169,21 +287,68 @@ class LinearProbeTable(Generic[K, V]):
 
         :complexity best: O(hash(key)) deleting item is not probed and in correct spot.
         :complexity worst: O(N*hash(key)+N^2*comp(K)) deleting item is midway through large chain.
+        With use_tombstones, the cluster is left alone, so deleting costs the same as a lookup.
+        Either way, the table is shrunk to the previous size once it becomes sparse enough.
         :raises KeyError: when the key doesn't exist.
         """
         position = self._linear_probe(key, False)
+        if self.use_tombstones:
+            self.array[position] = TOMBSTONE
+            self.count -= 1
+            self.tombstone_count += 1
+            self._shrink_if_sparse()
+            return
         # Remove the element
         self.array[position] = None
         self.count -= 1
         # Start moving over the cluster
         position = (position + 1) % self.table_size
         while self.array[position] is not None:
-            key2, value = self.array[position]
+            entry = self.array[position]
             self.array[position] = None
             # Reinsert.
-            newpos = self._linear_probe(key2, True)
-            self.array[newpos] = (key2, value)
+            self._place(entry)
             position = (position + 1) % self.table_size
+        self._shrink_if_sparse()
+
+    def probe_statistics(self) -> dict[str, dict[int, int]]:
+        """
+        Report how well the hash function spreads the current keys over the table.
+
+        Returns a dictionary with:
+            - "cluster_lengths": maps each length to the number of maximal runs of
+              occupied slots (tombstones included) with that length.
+            - "probe_counts": maps each probe count to the number of keys a successful
+              lookup finds after that many slots.
+
+        :complexity: O(N) where N is the tablesize.
+        """
+        cluster_lengths = {}
+        probe_counts = {}
+        size = self.table_size
+
+        for position, entry in enumerate(self.array):
+            if entry is not None and entry is not TOMBSTONE:
+                probes = (position - entry[2] % size) % size + 1
+                probe_counts[probes] = probe_counts.get(probes, 0) + 1
+
+        # Start right after an empty slot, so clusters that wrap around are counted once.
+        start = 0
+        while start < size and self.array[start] is not None:
+            start += 1
+        if start == size:
+            cluster_lengths[size] = 1
+        else:
+            length = 0
+            for offset in range(1, size + 1):
+                if self.array[(start + offset) % size] is None:
+                    if length > 0:
+                        cluster_lengths[length] = cluster_lengths.get(length, 0) + 1
+                    length = 0
+                else:
+                    length += 1
+
+        return {"cluster_lengths": cluster_lengths, "probe_counts": probe_counts}
 
     def is_empty(self) -> bool:
         return self.count == 0
@@ -191,25 +356,72 @@ class LinearProbeTable(Generic[K, V]):
     def is_full(self) -> bool:
         return self.count == self.table_size
 
+    def _place(self, entry: tuple[K, V, int]) -> None:
+        """
+        Put an entry whose key is known not to be in the table into the first
+        empty slot after its home position. Keys are never compared.
+
+        :complexity best: O(1) home position is empty
+        :complexity worst: O(N) where N is the tablesize
+        """
+        position = entry[2] % self.table_size
+        while self.array[position] is not None:
+            position = (position + 1) % self.table_size
+        self.array[position] = entry
+
+    def _table_size_at(self, index: int) -> int:
+        """
+        Returns the table size for a size index, appending primes of roughly double
+        the previous size to TABLE_SIZES when index is past its end.
+
+        :complexity: O(1) if the size is already known, otherwise see next_prime.
+        """
+        while index >= len(self.TABLE_SIZES):
+            self.TABLE_SIZES.append(next_prime(2 * self.TABLE_SIZES[-1] + 1))
+        return self.TABLE_SIZES[index]
+
     def _rehash(self) -> None:
         """
-        Need to resize table and reinsert all values
+        Need to resize table and reinsert all values.
+        The table grows to the next size, unless tombstones outnumber the live entries,
+        in which case it is compacted at its current size instead.
+
+        :complexity: See _resize.
+        """
+        if self.tombstone_count < self.count:
+            self._resize(self.size_index + 1)
+        else:
+            self._resize(self.size_index)
+
+    def _shrink_if_sparse(self) -> None:
+        """
+        Move to the previous table size once fewer than SHRINK_RATIO * max_load_factor
+        of the slots hold live entries.
 
-        :complexity best: O(N*hash(K)) No probing.
-        :complexity worst: O(N*hash(K) + N^2*comp(K)) Lots of probing.
+        :complexity: O(1) if the table is not shrunk, otherwise see _resize.
+        """
+        if self.size_index > 0 and self.count < self.table_size * self.max_load_factor * self.SHRINK_RATIO:
+            self._resize(self.size_index - 1)
+
+    def _resize(self, size_index: int) -> None:
+        """
+        Rebuild the table at the size for size_index, dropping any tombstones.
+        The stored hashes are reused, so keys are neither rehashed nor compared,
+        unless hash is overridden, see hash.
+
+        :complexity best: O(N) No probing.
+        :complexity worst: O(N^2) Lots of probing.
         Where N is len(self)
         """
         old_array = self.array
-        self.size_index += 1
-        if self.size_index >= len(self.TABLE_SIZES):
-            # Cannot be resized further.
-            return
-        self.array = ArrayR(self.TABLE_SIZES[self.size_index])
-        self.count = 0
-        for item in old_array:
-            if item is not None:
-                key, value = item
-                self[key] = value
+        self.size_index = size_index
+        self.array = ArrayR(self._table_size_at(size_index))
+        self.tombstone_count = 0
+        for entry in old_array:
+            if entry is not None and entry is not TOMBSTONE:
+                if self.size_dependent_hash:
+                    entry = (entry[0], entry[1], self.hash(entry[0]))
+                self._place(entry)
 
     def __str__(self) -> str:
         """
@@ -219,7 +431,139 @@ class LinearProbeTable(Generic[K, V]):
         """
         result = ""
         for item in self.array:
-            if item is not None:
-                (key, value) = item
+            if item is not None and item is not TOMBSTONE:
+                (key, value, _) = item
                 result += "(" + str(key) + "," + str(value) + ")\n"
         return result
+
+
+class RobinHoodTable(LinearProbeTable[K, V]):
+    """
+    Linear Probe Table using Robin Hood hashing.
+
+    On insert, an entry that has probed further from its home position than the entry
+    occupying a slot takes that slot, and the displaced entry carries on probing. This
+    keeps probe lengths even, so the table can run at a higher load factor.
+    Deletes shift the rest of the cluster back by one instead of leaving tombstones.
+
+    Entries, hashing and resizing are the same as in LinearProbeTable.
+    """
+
+    def __init__(self, sizes=None, max_load_factor: float = 0.85,
+                 hash_function: str | Callable[[K], int] = "universal") -> None:
+        """
+        Initialise the Hash Table. See LinearProbeTable for hash_function.
+
+        :raises ValueError: if max_load_factor is not strictly between 0 and 1,
+                            or hash_function is not known.
+        """
+        super().__init__(sizes, use_tombstones=False, max_load_factor=max_load_factor,
+                         hash_function=hash_function)
+
+    def _probe_distance(self, position: int) -> int:
+        """
+        Returns how far the entry at position is from its home position.
+        :pre: the slot at position is not empty.
+        """
+        return (position - self.array[position][2] % self.table_size) % self.table_size
+
+    def _linear_probe(self, key: K, is_insert: bool, key_hash: int = None) -> int:
+        """
+        Find the position of this key in the hash table.
+        A probe stops early once it meets an entry closer to its home position than
+        the key would be, since the key would have displaced that entry.
+        When is_insert is True and the key is missing, that position (or the empty slot
+        that ends the probe) is where the key should be inserted.
+        :complexity best: O(hash(key)) first position is empty
+        :complexity worst: O(hash(key) + P*comp(K)) where P is the longest probe length
+        :raises KeyError: When the key is not in the table, but is_insert is False.
+        :raises FullError: When a table is full and cannot be inserted.
+        """
+        if key_hash is None:
+            key_hash = self.full_hash(key)
+        size = self.table_size
+        position = key_hash % size
+
+        for distance in range(size):
+            entry = self.array[position]
+            if entry is None or (position - entry[2] % size) % size < distance:
+                if is_insert:
+                    return position
+                raise KeyError(key)
+            elif entry[2] == key_hash and entry[0] == key:
+                return position
+            position = (position + 1) % size
+
+        if is_insert:
+            raise FullError("Table is full!")
+        else:
+            raise KeyError(key)
+
+    def __setitem__(self, key: K, data: V) -> None:
+        """
+        Set an (key, value) pair in our hash table.
+
+        :complexity: See linear probe, plus the length of the cluster shifted along.
+        :raises FullError: when the table is full.
+        """
+        key_hash = self.full_hash(key)
+        position = self._linear_probe(key, True, key_hash)
+        entry = self.array[position]
+
+        if entry is not None and entry[2] == key_hash and entry[0] == key:
+            self.array[position] = (key, data, key_hash)
+            return
+
+        self.count += 1
+        self._displace((key, data, key_hash), position)
+
+        if len(self) > self.table_size * self.max_load_factor:
+            self._rehash()
+
+    def __delitem__(self, key: K) -> None:
+        """
+        Deletes a (key, value) pair in our hash table, shifting the following
+        entries of the cluster back by one until one is at its home position.
+
+        :complexity: See linear probe, plus the length of the cluster shifted back.
+        :raises KeyError: when the key doesn't exist.
+        """
+        position = self._linear_probe(key, False)
+        self.count -= 1
+        following = (position + 1) % self.table_size
+        while self.array[following] is not None and self._probe_distance(following) > 0:
+            self.array[position] = self.array[following]
+            position = following
+            following = (following + 1) % self.table_size
+        self.array[position] = None
+        self._shrink_if_sparse()
+
+    def _place(self, entry: tuple[K, V, int]) -> None:
+        """
+        Put an entry whose key is known not to be in the table into the table.
+
+        :complexity: O(P) where P is the length of the cluster it ends up in.
+        """
+        self._displace(entry, entry[2] % self.table_size)
+
+    def _displace(self, entry: tuple[K, V, int], position: int) -> None:
+        """
+        Store entry at position, swapping it with any entry closer to its home
+        position on the way, until an empty slot takes the last displaced entry.
+
+        :pre: the table has an empty slot.
+        :complexity: O(P) where P is the length of the cluster it ends up in.
+        """
+        size = self.table_size
+        distance = (position - entry[2] % size) % size
+        current = self.array[position]
+        while current is not None:
+            current_distance = (position - current[2] % size) % size
+            if current_distance < distance:
+                self.array[position] = entry
+                entry = current
+                distance = current_distance
+            position = (position + 1) % size
+            distance += 1
+            current = self.array[position]
+        self.array[position] = entry
@@ -3,7 +3,8 @@ from __future__ import annotations
 __author__ = "Brendon Taylor, modified by Jackson Goerner"
 __docformat__ = 'reStructuredText'
 
-from typing import Generic
+from operator import gt, lt
+from typing import Callable, Generic, Iterable
 from data_structures.referential_array import ArrayR, T
 
 
@@ -82,13 +83,399 @@ class MaxHeap(Generic[T]):
             self.sink(1)
         return max_elt
 
+    def _element(self, k: int) -> T:
+        """ Returns the element stored at index k of the array. """
+        return self.the_array[k]
+
+    def nlargest(self, k: int) -> list[T]:
+        """ Returns the k largest elements in descending order, leaving the heap intact.
+            Walks the heap with a frontier heap of (element, index) pairs: popping an index
+            makes its two children candidates, so only O(k) indices are ever looked at.
+            :complexity: O(k log(k)) comparisons
+        """
+        k = min(k, self.length)
+        result = []
+        if k <= 0:
+            return result
+        frontier = MaxHeap(k + 1)
+        frontier.add((self._element(1), 1))
+        while len(result) < k:
+            element, index = frontier.get_max()
+            result.append(element)
+            for child in (2 * index, 2 * index + 1):
+                if child <= self.length:
+                    frontier.add((self._element(child), child))
+        return result
+
+    def pop_many(self, k: int) -> list[T]:
+        """ Removes and returns the k largest elements (or all of them if there are
+            fewer than k) in descending order.
+            :complexity: O(k log(N)) where N is len(self)
+        """
+        result = []
+        for _ in range(min(k, self.length)):
+            result.append(self.get_max())
+        return result
+
+    @classmethod
+    def heapify(cls, points: ArrayR[T] | Iterable[T], overwrite_size: int = 0, in_place: bool = False) -> MaxHeap[T]:
+        """ Builds a heap from the points with Floyd's bottom-up method.
+
+            points can be an ArrayR or any sized iterable. The heap gets room for exactly
+            len(points) elements, or overwrite_size if that is given.
+
+            If in_place is True, points must be an ArrayR laid out like the heap's own
+            array: slot 0 unused and the elements in slots 1 to len(points) - 1.
+            It becomes the heap's array without being copied.
+
+            :complexity: O(N) where N is the number of points
+            :raises TypeError: if in_place is True and points is not an ArrayR
+        """
+        if in_place:
+            if not isinstance(points, ArrayR):
+                raise TypeError("in_place needs an ArrayR, not {0}".format(type(points).__name__))
+            self = cls.__new__(cls)
+            self.the_array = points
+            self.length = len(points) - 1
+        else:
+            length = len(points)
+            self = cls(max(overwrite_size, length))
+            self.length = length
+            if isinstance(points, (ArrayR, list, tuple)):
+                self.the_array.copy_from(points, 0, length, 1)
+            else:
+                for i, point in enumerate(points):
+                    self.the_array[i+1] = point
+        for k in range(self.length // 2, 0, -1):
+            self.sink(k)
+        return self
+
+
+
+class HeapHandle(Generic[T]):
+    """ Reference to an element of an IndexedMaxHeap.
+
+        Attributes:
+            value (T): the element
+            index (int): its position in the heap array, 0 once it has left the heap
+    """
+    __slots__ = ('value', 'index')
+
+    def __init__(self, value: T) -> None:
+        self.value = value
+        self.index = 0
+
+
+class IndexedMaxHeap(MaxHeap[T]):
+    """ Max heap of HeapHandles, each of which knows its position in the array,
+        so any element can be updated or removed in O(log N) given its handle.
+    """
+
+    def rise(self, k: int) -> None:
+        """
+        Rise element at index k to its correct position, keeping the handle indices current.
+        :pre: 1 <= k <= self.length
+        :complexity: O(log N) where N is len(self)
+        """
+        handle = self.the_array[k]
+        while k > 1 and handle.value > self.the_array[k // 2].value:
+            self.the_array[k] = self.the_array[k // 2]
+            self.the_array[k].index = k
+            k = k // 2
+        self.the_array[k] = handle
+        handle.index = k
+
+    def add(self, element: T) -> HeapHandle[T]:
+        """
+        Adds the element and returns its handle.
+        :complexity: O(log N) where N is len(self)
+        :raises IndexError: if the heap is full
+        """
+        if self.is_full():
+            raise IndexError
+
+        handle = HeapHandle(element)
+        self.length += 1
+        self.the_array[self.length] = handle
+        self.rise(self.length)
+        return handle
+
+    def _element(self, k: int) -> T:
+        """ Returns the element behind the handle at index k of the array. """
+        return self.the_array[k].value
+
+    def largest_child(self, k: int) -> int:
+        """
+        Returns the index of k's child with greatest value.
+        :pre: 1 <= k <= self.length // 2
+        """
+        if 2 * k == self.length or \
+                self.the_array[2 * k].value > self.the_array[2 * k + 1].value:
+            return 2 * k
+        else:
+            return 2 * k + 1
+
+    def sink(self, k: int) -> None:
+        """ Make the element at index k sink to the correct position,
+            keeping the handle indices current.
+            :pre: 1 <= k <= self.length
+            :complexity: O(log N) where N is len(self)
+        """
+        handle = self.the_array[k]
+
+        while 2 * k <= self.length:
+            max_child = self.largest_child(k)
+            if self.the_array[max_child].value <= handle.value:
+                break
+            self.the_array[k] = self.the_array[max_child]
+            self.the_array[k].index = k
+            k = max_child
+
+        self.the_array[k] = handle
+        handle.index = k
+
+    def get_max(self) -> T:
+        """ Remove (and return) the maximum element from the heap.
+            :complexity: O(log N) where N is len(self)
+            :raises IndexError: if the heap is empty
+        """
+        if self.length == 0:
+            raise IndexError
+        return self.remove(self.the_array[1])
+
+    def peek(self) -> T:
+        """ Return the maximum element without removing it.
+            :complexity: O(1)
+            :raises IndexError: if the heap is empty
+        """
+        return self.max_handle().value
+
+    def max_handle(self) -> HeapHandle[T]:
+        """ Return the handle of the maximum element without removing it.
+            :complexity: O(1)
+            :raises IndexError: if the heap is empty
+        """
+        if self.length == 0:
+            raise IndexError
+        return self.the_array[1]
+
+    def update(self, handle: HeapHandle[T], new_value: T) -> None:
+        """ Change the element behind handle, moving it up or down as needed.
+            :complexity: O(log N) where N is len(self)
+            :raises KeyError: if the handle is not in this heap
+        """
+        self._check_handle(handle)
+        old_value = handle.value
+        handle.value = new_value
+        if new_value > old_value:
+            self.rise(handle.index)
+        else:
+            self.sink(handle.index)
+
+    def remove(self, handle: HeapHandle[T]) -> T:
+        """ Remove (and return) the element behind handle.
+            :complexity: O(log N) where N is len(self)
+            :raises KeyError: if the handle is not in this heap
+        """
+        self._check_handle(handle)
+        k = handle.index
+        last = self.the_array[self.length]
+        self.the_array[self.length] = None
+        self.length -= 1
+        handle.index = 0
+        if k <= self.length:
+            self.the_array[k] = last
+            last.index = k
+            if last.value > handle.value:
+                self.rise(k)
+            else:
+                self.sink(k)
+        return handle.value
+
+    def _check_handle(self, handle: HeapHandle[T]) -> None:
+        """ :raises KeyError: if the handle is not in this heap """
+        if not 1 <= handle.index <= self.length or self.the_array[handle.index] is not handle:
+            raise KeyError('Handle is not in the heap')
+
+    @classmethod
+    def heapify(cls, points: ArrayR[T] | Iterable[T], overwrite_size: int = 0, in_place: bool = False) -> IndexedMaxHeap[T]:
+        """ Builds a heap from the points bottom-up, with room for exactly len(points)
+            elements, or overwrite_size if that is given. Use max_handle or
+            handles to find the handle of an element afterwards.
+
+            If in_place is True, points is adopted as in MaxHeap.heapify, and each of
+            its elements is replaced by its handle.
+
+            :complexity: O(N) where N is len(points)
+            :raises TypeError: if in_place is True and points is not an ArrayR
+        """
+        if in_place:
+            if not isinstance(points, ArrayR):
+                raise TypeError("in_place needs an ArrayR, not {0}".format(type(points).__name__))
+            self = cls.__new__(cls)
+            self.the_array = points
+            self.length = len(points) - 1
+            for k in range(1, self.length + 1):
+                handle = HeapHandle(points[k])
+                handle.index = k
+                points[k] = handle
+        else:
+            self = cls(max(overwrite_size, len(points)))
+            self.length = len(points)
+            for i, point in enumerate(points):
+                handle = HeapHandle(point)
+                handle.index = i + 1
+                self.the_array[i+1] = handle
+        for k in range(self.length // 2, 0, -1):
+            self.sink(k)
+        return self
+
+    def handles(self) -> list[HeapHandle[T]]:
+        """ Returns the handles of all elements, in heap array order.
+            :complexity: O(N) where N is len(self)
+        """
+        return self.the_array[1:self.length + 1]
+
+
+
+class DaryHeap(Generic[T]):
+    """ Array heap with a configurable number of children per node.
+
+        - arity:    children per node. 4 halves the depth of a binary heap,
+                    at the cost of more comparisons per level when sinking.
+        - key:      computed once per element when it is added, and used for
+                    every comparison instead of the element itself.
+        - max_heap: True to pop the largest key first, False for the smallest.
+
+        Elements are stored as (key, element) pairs in one array indexed from 0, so
+        the children of i are arity * i + 1 to arity * i + arity. The array doubles
+        when full, so add never runs out of space.
+
+        Keys and elements share one array of pairs, so moving an element is a single
+        ArrayR write, which costs more than comparing simple keys. A key only pays off
+        when comparing elements is expensive, e.g. Islands, whose __lt__ builds tuples.
+        See benchmarks/heaps.py for measurements.
+    """
+    MIN_CAPACITY = 1
+
+    def __init__(self, arity: int = 2, key: Callable[[T], object] = None, max_heap: bool = True,
+                 capacity: int = MIN_CAPACITY) -> None:
+        """
+            :complexity: O(capacity)
+            :raises ValueError: if arity < 2
+        """
+        if arity < 2:
+            raise ValueError("Arity should be at least 2.")
+        self.arity = arity
+        self.key = key
+        self.max_heap = max_heap
+        self.before = gt if max_heap else lt
+        self.length = 0
+        self.entries = ArrayR(max(self.MIN_CAPACITY, capacity))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _grow(self) -> None:
+        """ Double the capacity of the array.
+            :complexity: O(N) where N is len(self), O(1) amortised over adds
+        """
+        self.entries.resize(2 * len(self.entries))
+
+    def rise(self, k: int) -> None:
+        """ Rise element at index k to its correct position.
+            :pre: 0 <= k < self.length
+            :complexity: O(log_d(N)) comparisons where d is the arity and N is len(self)
+        """
+        # The raw ctypes array, to skip ArrayR's per-element method dispatch.
+        entries, before, arity = self.entries.array, self.before, self.arity
+        entry = entries[k]
+        key = entry[0]
+        while k > 0:
+            parent = (k - 1) // arity
+            parent_entry = entries[parent]
+            if not before(key, parent_entry[0]):
+                break
+            entries[k] = parent_entry
+            k = parent
+        entries[k] = entry
+
+    def sink(self, k: int) -> None:
+        """ Make the element at index k sink to the correct position.
+            :pre: 0 <= k < self.length
+            :complexity: O(d * log_d(N)) comparisons where d is the arity and N is len(self)
+        """
+        entries, before, arity, length = self.entries.array, self.before, self.arity, self.length
+        entry = entries[k]
+        key = entry[0]
+        while True:
+            first = arity * k + 1
+            if first >= length:
+                break
+            best = first
+            best_entry = entries[first]
+            for child in range(first + 1, min(first + arity, length)):
+                child_entry = entries[child]
+                if before(child_entry[0], best_entry[0]):
+                    best = child
+                    best_entry = child_entry
+            if not before(best_entry[0], key):
+                break
+            entries[k] = best_entry
+            k = best
+        entries[k] = entry
+
+    def add(self, element: T) -> None:
+        """ Add an element, growing the array if it is full.
+            :complexity: O(key(element) + log_d(N)) amortised
+        """
+        if self.length == len(self.entries):
+            self._grow()
+        self.entries.array[self.length] = (element if self.key is None else self.key(element), element)
+        self.length += 1
+        self.rise(self.length - 1)
+
+    def peek(self) -> T:
+        """ Return the first element in heap order without removing it.
+            :complexity: O(1)
+            :raises IndexError: if the heap is empty
+        """
+        if self.length == 0:
+            raise IndexError
+        return self.entries.array[0][1]
+
+    def pop(self) -> T:
+        """ Remove (and return) the first element in heap order.
+            :complexity: O(d * log_d(N))
+            :raises IndexError: if the heap is empty
+        """
+        if self.length == 0:
+            raise IndexError
+        entries = self.entries.array
+        first = entries[0][1]
+        self.length -= 1
+        if self.length > 0:
+            entries[0] = entries[self.length]
+            self.sink(0)
+        entries[self.length] = None
+        return first
+
     @classmethod
-    def heapify(cls, points: ArrayR[T], overwrite_size: int = 0) -> MaxHeap[T]:
-        self = MaxHeap(overwrite_size or (2 * len(points) + 2))
-        self.length = len(points)
-        for i in range(len(points)):
-            self.the_array[i+1] = points[i]
-        for k in range(len(points), 0, -1):
+    def heapify(cls, points: Iterable[T], arity: int = 2, key: Callable[[T], object] = None,
+                max_heap: bool = True) -> DaryHeap[T]:
+        """ Build a heap from the points bottom-up.
+            :complexity: O(N) where N is the number of points
+        """
+        if key is None:
+            entries = [(point, point) for point in points]
+        else:
+            entries = [(key(point), point) for point in points]
+        self = cls(arity, key, max_heap, len(entries))
+        self.length = len(entries)
+        if self.length == 0:
+            return self
+        self.entries.copy_from(entries)
+        for k in range((self.length - 2) // arity, -1, -1):
             self.sink(k)
         return self
 
@@ -23,6 +23,8 @@ class TreeNode(Generic[K, I]):
         self.item = item
         self.left = None
         self.right = None
+        # Number of nodes in the subtree rooted at this node.
+        self.size = 1
 
     def __str__(self):
         """
@@ -12,17 +12,29 @@ space to hold the references.
 Note that while I do check the precondition in __init__ (noone else
 would), I do not check that of getitem or setitem, since that is already
 checked by self.array[index].
+
+Slices, copy_from, resize and iteration all go through ctypes slicing,
+so they copy whole blocks of references in C instead of dispatching to
+__getitem__/__setitem__ once per element.
+
+ArrayF and ArrayI are the same idea for float64 and int64 values: the
+elements are stored unboxed in contiguous, zero-initialised memory, which
+can be shared with NumPy, struct or files through memoryview().
 """
+from __future__ import annotations
+
 __author__ = "Julian Garcia for the __init__ code, Maria Garcia de la Banda for the rest"
 __docformat__ = 'reStructuredText'
 
-from ctypes import py_object
-from typing import TypeVar, Generic
+from ctypes import addressof, c_double, c_int64, memmove, py_object, sizeof
+from typing import BinaryIO, Iterator, Sequence, TypeVar, Generic
 
 T = TypeVar('T')
 
 
 class ArrayR(Generic[T]):
+    ELEMENT_TYPE = py_object
+
     def __init__(self, length: int) -> None:
         """ Creates an array of references to objects of the given length
         :complexity: O(length) for best/worst case to initialise to None
@@ -30,8 +42,15 @@ class ArrayR(Generic[T]):
         """
         if length <= 0:
             raise ValueError("Array length should be larger than 0.")
-        self.array = (length * py_object)() # initialises the space
-        self.array[:] =  [None for _ in range(length)]
+        self.array = self._allocate(length)
+
+    def _allocate(self, length: int):
+        """ Returns a new ctypes array of the given length with every element set to None.
+        :complexity: O(length)
+        """
+        array = (length * self.ELEMENT_TYPE)() # initialises the space
+        array[:] = [None] * length
+        return array
 
     def __len__(self) -> int:
         """ Returns the length of the array
@@ -39,16 +58,130 @@ class ArrayR(Generic[T]):
         """
         return len(self.array)
 
-    def __getitem__(self, index: int) -> T:
-        """ Returns the object in position index.
-        :complexity: O(1)
+    def __iter__(self) -> Iterator[T]:
+        """ Iterates over a snapshot of the array.
+        :complexity: O(length) to take the snapshot, then O(1) per element
+        """
+        return iter(self.array[:])
+
+    def __getitem__(self, index: int | slice) -> T | list[T]:
+        """ Returns the object in position index, or a list of the objects in a slice.
+        :complexity: O(1) for an index, O(len(slice)) for a slice
         :pre: index in between 0 and length - self.array[] checks it
         """
         return self.array[index]
 
-    def __setitem__(self, index: int, value: T) -> None:
-        """ Sets the object in position index to value
-        :complexity: O(1)
+    def __setitem__(self, index: int | slice, value: T | Sequence[T]) -> None:
+        """ Sets the object in position index to value, or the objects in
+        a slice to the elements of value.
+        :complexity: O(1) for an index, O(len(slice)) for a slice
         :pre: index in between 0 and length - self.array[] checks it
+        :pre: for a slice, len(value) is the length of the slice
         """
         self.array[index] = value
+
+    def copy_from(self, src: ArrayR[T] | Sequence[T], start: int = 0, count: int = None, offset: int = 0) -> None:
+        """ Copies count elements of src, starting at src[start], into this array
+        starting at self[offset]. By default, copies everything from start onwards.
+        :complexity: O(count)
+        :pre: the elements to copy fit in both arrays
+        :raises ValueError: if the range does not fit in either array
+        """
+        if count is None:
+            count = len(src) - start
+        if start < 0 or count < 0 or start + count > len(src) or offset < 0 or offset + count > len(self):
+            raise ValueError("Copy range out of bounds.")
+        if isinstance(src, ArrayR):
+            src = src.array
+        self.array[offset:offset + count] = src[start:start + count]
+
+    def resize(self, new_length: int) -> None:
+        """ Changes the length of the array in place, keeping the first
+        min(len(self), new_length) elements and filling the rest with None
+        (zero for ArrayF and ArrayI).
+        :complexity: O(new_length)
+        :pre: new_length > 0
+        """
+        if new_length <= 0:
+            raise ValueError("Array length should be larger than 0.")
+        kept = min(len(self), new_length)
+        new_array = self._allocate(new_length)
+        new_array[:kept] = self.array[:kept]
+        self.array = new_array
+
+
+class _TypedArray(ArrayR[T]):
+    """ Base class of arrays storing unboxed numbers of type ELEMENT_TYPE. """
+
+    def _allocate(self, length: int):
+        """ Returns a new ctypes array of the given length. ctypes zero-initialises it.
+        :complexity: O(length)
+        """
+        return (length * self.ELEMENT_TYPE)()
+
+    @classmethod
+    def from_buffer(cls, buffer) -> _TypedArray[T]:
+        """ Creates an array sharing the memory of a writable buffer, such as a
+        bytearray, a NumPy array or another array's memoryview(). No data is copied,
+        until a resize moves the array to memory of its own.
+        :complexity: O(1)
+        :pre: the buffer size is a positive multiple of the element size
+        """
+        itemsize = sizeof(cls.ELEMENT_TYPE)
+        nbytes = memoryview(buffer).nbytes
+        if nbytes == 0 or nbytes % itemsize != 0:
+            raise ValueError("Buffer size should be a positive multiple of {0}.".format(itemsize))
+        self = cls.__new__(cls)
+        self.array = (nbytes // itemsize * cls.ELEMENT_TYPE).from_buffer(buffer)
+        return self
+
+    @classmethod
+    def read_from(cls, file: BinaryIO, length: int) -> _TypedArray[T]:
+        """ Reads length elements from a binary file straight into a new array.
+        :complexity: O(length)
+        :raises EOFError: if the file holds fewer than length elements
+        """
+        self = cls(length)
+        if file.readinto(self.memoryview()) != length * sizeof(cls.ELEMENT_TYPE):
+            raise EOFError("File holds fewer than {0} elements.".format(length))
+        return self
+
+    def memoryview(self) -> memoryview:
+        """ Returns a writable view of the underlying memory, e.g. for numpy.frombuffer.
+        :complexity: O(1)
+        """
+        return memoryview(self.array).cast('B').cast(self.FORMAT)
+
+    def write_to(self, file: BinaryIO) -> None:
+        """ Writes the raw elements to a binary file.
+        :complexity: O(length)
+        """
+        file.write(self.memoryview())
+
+    def copy_from(self, src: ArrayR[T] | Sequence[T], start: int = 0, count: int = None, offset: int = 0) -> None:
+        """ See ArrayR.copy_from. Copying between arrays of the same type is a
+        single memmove.
+        :complexity: O(count)
+        :raises ValueError: if the range does not fit in either array
+        """
+        if type(src) is not type(self):
+            super().copy_from(src, start, count, offset)
+            return
+        if count is None:
+            count = len(src) - start
+        if start < 0 or count < 0 or start + count > len(src) or offset < 0 or offset + count > len(self):
+            raise ValueError("Copy range out of bounds.")
+        itemsize = sizeof(self.ELEMENT_TYPE)
+        memmove(addressof(self.array) + offset * itemsize, addressof(src.array) + start * itemsize, count * itemsize)
+
+
+class ArrayF(_TypedArray[float]):
+    """ Array of float64 values, 8 bytes each. """
+    ELEMENT_TYPE = c_double
+    FORMAT = 'd'
+
+
+class ArrayI(_TypedArray[int]):
+    """ Array of int64 values, 8 bytes each. """
+    ELEMENT_TYPE = c_int64
+    FORMAT = 'q'
@@ -1,4 +1,8 @@
+from __future__ import annotations
+from array import array
 from dataclasses import dataclass
+from typing import Iterable, Iterator
+import sys
 from random_gen import RandomGen
 
 # Islands can have names other than this. This is just used for random generation.
@@ -59,4 +63,85 @@ class Island:
 
     def __eq__(self, other):
         # Define how two Island instances are equal
-        return (self.money, self.marines) == (other.money, other.marines)
\ No newline at end of file
+        return (self.money, self.marines) == (other.money, other.marines)
+
+
+@dataclass(slots=True)
+class CompactIsland:
+    """
+    Island without a per-instance __dict__, for when millions of islands are alive at once.
+    Compares the same way as Island.
+    """
+
+    name: str
+    money: float
+    marines: int
+
+    __lt__ = Island.__lt__
+    __le__ = Island.__le__
+    __eq__ = Island.__eq__
+
+
+class IslandTable:
+    """
+    Columnar storage for many islands.
+
+    Names are interned and kept in a list, while money and marines are stored in
+    array('d') and array('i') columns, so the numeric data takes 8 and 4 bytes per island
+    and can be handed to vectorised code through the buffer protocol without copies,
+    e.g. numpy.frombuffer(table.money).
+
+    Indexing or iterating over the table builds CompactIsland rows on demand.
+    Changing those rows does not change the table, and each call builds a new object,
+    so code that keeps track of islands in a table (e.g. Mode1Navigator.update_row)
+    does it by row index.
+    """
+
+    def __init__(self) -> None:
+        """
+        :complexity: O(1)
+        """
+        self.names: list[str] = []
+        self.money = array('d')
+        self.marines = array('i')
+
+    @classmethod
+    def from_islands(cls, islands: Iterable[Island]) -> IslandTable:
+        """
+        Build a table from island objects.
+        :complexity: O(N) where N is the number of islands.
+        """
+        table = cls()
+        for island in islands:
+            table.append(island.name, island.money, island.marines)
+        return table
+
+    def append(self, name: str, money: float, marines: int) -> None:
+        """
+        Add an island to the end of the table.
+        :complexity: O(1) amortised
+        """
+        self.names.append(sys.intern(name))
+        self.money.append(money)
+        self.marines.append(marines)
+
+    def __len__(self) -> int:
+        """
+        :complexity: O(1)
+        """
+        return len(self.names)
+
+    def __getitem__(self, index: int) -> CompactIsland:
+        """
+        Returns a new CompactIsland holding the data of row index.
+        :complexity: O(1)
+        """
+        return CompactIsland(self.names[index], self.money[index], self.marines[index])
+
+    def __iter__(self) -> Iterator[CompactIsland]:
+        """
+        Iterate over the rows of the table as CompactIsland objects.
+        :complexity: O(1) per row
+        """
+        for index in range(len(self)):
+            yield self[index]
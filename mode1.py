@@ -1,41 +1,111 @@
-from island import Island
-from data_structures.bst import BinarySearchTree, BSTInOrderIterator
-from algorithms.binary_search import binary_search
+from __future__ import annotations
+from array import array
+from island import Island, IslandTable
+from data_structures.bst import AVLTree, PersistentAVLTree
+from algorithms.binary_search import bisect_right
+from algorithms.mergesort import mergesort
+from contextlib import contextmanager
+from typing import Callable, Iterator
+import copy
 import math
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the pure Python path is used without it.
+    np = None
+
+
 class Mode1Navigator:
     """
     Student-TODO: short paragraph as per https://edstem.org/au/courses/12108/lessons/42810/slides/294117
     """
 
-    def __init__(self, islands: list[Island], crew: int) -> None:
+    def __init__(self, islands: list[Island] | IslandTable, crew: int, persistent: bool = False) -> None:
         """
-        Student-TODO: Best/Worst Case
+        Groups the islands by their marines/money ratio in an AVL tree.
+        The ratios are sorted with mergesort and the tree is bulk loaded from the
+        sorted buckets, so it is balanced whatever order the islands arrive in.
+
+        An IslandTable is read through its columns instead: the buckets hold row indices,
+        so no object is built per island, and islands are changed with update_row.
+        select_islands still returns CompactIslands, built for the selected rows only.
+
+        If persistent is True, the tree is a PersistentAVLTree and update_island publishes
+        each change as a new version with a single assignment to self.bst, so a query
+        running alongside it sees either the whole update or none of it. Islands are
+        never changed in place either: an update stores a changed copy of the island in
+        the new version, so a reader holding an older version keeps seeing the old values.
+        The islands passed in (and the copies returned by select_islands) can still be
+        passed to update_island, which looks up the island's latest copy.
+
+        :complexity: Best/Worst Case O(N * log(N)) where N is len(islands), for the sort.
+        :raises ValueError: if persistent is True and islands is an IslandTable.
         """
         self.island = islands
         self.crew = crew
-        self.bst = BinarySearchTree()
+        self.persistent = persistent
+        self.table = islands if isinstance(islands, IslandTable) else None
+        # For persistent navigators: id(island) -> (island, its latest copy) for the islands
+        # passed in, and id(copy) -> (copy, island passed in) for the latest copies.
+        self._latest = {}
+        self._original = {}
+        # (snapshot, index) and (snapshot, arrays), so a cache built from an older tree is never used.
+        self._crew_index = None
+        self._crew_arrays = None
 
-        for island in islands:
-            key = island.marines/island.money
-            if key not in self.bst:
-                self.bst[key] = [island]
+        if self.table is None:
+            # mergesort is stable, so islands sharing a ratio keep their input order.
+            ratios = mergesort([(island.marines/island.money, island) for island in islands], key=lambda pair: pair[0])
+        elif persistent:
+            raise ValueError("A persistent navigator cannot share an IslandTable's columns.")
+        else:
+            ratios = self._table_ratios()
+        buckets = []
+        for key, island in ratios:
+            if len(buckets) > 0 and buckets[-1][0] == key:
+                buckets[-1][1].append(island)
             else:
-                self.bst[key].append(island)
+                buckets.append((key, [island]))
+        self.bst = (PersistentAVLTree if persistent else AVLTree).from_sorted(buckets)
+
+    def _table_ratios(self) -> list[tuple[float, int]]:
+        """
+        Returns (marines/money, row) for every row of the table, sorted by ratio and then row,
+        computed from the columns with NumPy if it is installed.
+
+        :complexity: O(N * log(N)) where N is the number of rows.
+        """
+        table = self.table
+        if np is None:
+            return mergesort([(table.marines[row]/table.money[row], row) for row in range(len(table))],
+                             key=lambda pair: pair[0])
+        # The views are dropped before returning, since the table cannot grow while they exist.
+        ratio = np.frombuffer(table.marines, dtype=np.intc) / np.frombuffer(table.money, dtype=np.float64)
+        order = np.argsort(ratio, kind='stable')
+        return list(zip(ratio[order].tolist(), order.tolist()))
 
 
     def select_islands(self) -> list[tuple[Island, int]]:
         """
-        Student-TODO: Best/Worst Case
+        Greedily sends the crew to the islands in increasing marines/money order,
+        scanning the tree's cached in-order snapshot.
+
+        :complexity best: O(1) when the snapshot is cached and the crew is empty.
+        :complexity worst: O(N) where N is the number of islands.
         """
         selected_islands = []
         remaining_crew = self.crew
+        table = self.table
 
-        for island_list in BSTInOrderIterator(self.bst.root):
+        for _, islands in self.bst.snapshot():
             if remaining_crew <= 0:
                 break
 
-            islands = island_list.item
             for island in islands:
+                if table is not None:
+                    island = table[island]
                 pirates = min(remaining_crew, island.marines)
                 selected_islands.append((island, pirates))
                 remaining_crew -= pirates
@@ -45,42 +115,543 @@ class Mode1Navigator:
 
     def select_islands_from_crew_numbers(self, crew_numbers: list[int]) -> list[float]:
         """
-        Student-TODO: Best/Worst Case
+        Answers each crew size against a prefix-sum index over the islands in ratio order.
+        Every island before the cut-off is fully plundered, so its profit is already summed
+        in the index, and only the island the crew runs out on contributes a partial term.
+
+        If NumPy is installed and crew_numbers is a NumPy array, all the queries are
+        answered at once and a NumPy array of profits is returned instead of a list.
+
+        :complexity best: O(Q * log(N)) when the index is already built.
+        :complexity worst: O(N + Q * log(N)) when the index has to be (re)built first.
+        Where N is the number of islands and Q is len(crew_numbers).
+        :raises ValueError: if a crew size is negative.
         """
+        if np is not None and isinstance(crew_numbers, np.ndarray):
+            return self._select_islands_from_crew_array(crew_numbers)
+
+        cumulative_marines, cumulative_money, island_marines, island_money = self._get_crew_index()
         profit_list = []
 
         for crew_size in crew_numbers:
-            money_earned = 0
-            remaining_crew = crew_size
-
-            for island_node in BSTInOrderIterator(self.bst.root):
-                islands = island_node.item
-                for island in islands:
-                    available_pirates = min(remaining_crew, island.marines)
-                    money_earned += self.calculate_profitability(island, available_pirates)
-                    remaining_crew -= available_pirates
-                if remaining_crew <= 0:
-                    break
+            if crew_size < 0:
+                raise ValueError("Crew size should not be negative: {0}".format(crew_size))
+            # Number of islands that can be fully plundered with this crew.
+            full = bisect_right(cumulative_marines, crew_size) - 1
+            money_earned = cumulative_money[full]
+            if full < len(island_marines):
+                # Same rounding as calculate_profitability.
+                remaining_crew = crew_size - cumulative_marines[full]
+                money = island_money[full]
+                money_earned += math.ceil(min(remaining_crew / island_marines[full] * money, money))
             profit_list.append(math.ceil(money_earned))
 
         return profit_list
 
+    def _select_islands_from_crew_array(self, crew_numbers: np.ndarray) -> np.ndarray:
+        """
+        Vectorised select_islands_from_crew_numbers, using searchsorted over the
+        cumulative marines and the same rounding as calculate_profitability.
+
+        :complexity: O(Q * log(N)) once the arrays are built, see _get_crew_arrays.
+        :raises TypeError: if crew_numbers does not hold integers or floats.
+        :raises ValueError: if a crew size is negative.
+        """
+        cumulative_marines, cumulative_money, island_marines, island_money = self._get_crew_arrays()
+        crews = np.asarray(crew_numbers)
+        # Fractional crews are kept as they are, like the list path does.
+        if crews.dtype.kind in 'biu':
+            crews = crews.astype(np.int64, copy=False)
+        elif crews.dtype.kind == 'f':
+            crews = crews.astype(np.float64, copy=False)
+        else:
+            raise TypeError("Crew sizes should be numbers, not {0}".format(crews.dtype))
+        if crews.size > 0 and crews.min() < 0:
+            raise ValueError("Crew size should not be negative: {0}".format(crews.min()))
+        full = np.searchsorted(cumulative_marines, crews, side='right') - 1
+        remaining_crew = crews - cumulative_marines[full]
+        marines = island_marines[full]
+        money = island_money[full]
+        partial = np.ceil(np.minimum(remaining_crew / marines * money, money))
+        return np.ceil(cumulative_money[full] + partial).astype(np.int64)
 
-    def update_island(self, island: Island, new_money: float, new_marines: int) -> None:
+    def _get_crew_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """
-        Student-TODO: Best/Worst Case
+        NumPy version of the prefix-sum index, building it on first use.
+        For an IslandTable it is gathered straight from the columns, without going
+        through the list index.
+
+        The per-island arrays carry one extra island with 1 marine and no money, so a
+        crew that plunders every island reads a zero partial term instead of going
+        out of bounds.
+
+        :complexity: O(1) when cached, otherwise O(N) where N is the number of islands.
         """
+        snapshot = self.bst.snapshot()
+        cache = self._crew_arrays
+        if cache is None or cache[0] is not snapshot:
+            table = self.table
+            if table is None:
+                cumulative_marines, cumulative_money, island_marines, island_money = self._get_crew_index()
+                arrays = (
+                    np.array(cumulative_marines, dtype=np.int64),
+                    np.array(cumulative_money, dtype=np.int64),
+                    np.array(island_marines + [1], dtype=np.float64),
+                    np.array(island_money + [0], dtype=np.float64),
+                )
+            else:
+                rows = np.fromiter((row for _, bucket in snapshot for row in bucket), dtype=np.intp)
+                # Indexing copies, so no view of the columns outlives this call.
+                marines = np.frombuffer(table.marines, dtype=np.intc)[rows].astype(np.int64)
+                money = np.frombuffer(table.money, dtype=np.float64)[rows]
+                arrays = (
+                    np.concatenate(([0], np.cumsum(marines))),
+                    np.concatenate(([0], np.cumsum(np.ceil(money).astype(np.int64)))),
+                    np.append(marines, 1).astype(np.float64),
+                    np.append(money, 0),
+                )
+            cache = (snapshot, arrays)
+            self._crew_arrays = cache
+        return cache[1]
+
+    def _get_crew_index(self) -> tuple[list[int], list[int], list[int], list[float]]:
+        """
+        Returns the prefix-sum index used by select_islands_from_crew_numbers,
+        building it on first use.
+
+        cumulative_marines[i] and cumulative_money[i] are the marines and (rounded up)
+        money of the first i islands in ratio order, so both lists have length N + 1.
+        island_marines[i] and island_money[i] are those of the i-th island itself.
 
-        position = binary_search(self.island, island)
+        :complexity: O(1) when cached, otherwise O(N) where N is the number of islands.
+        """
+        snapshot = self.bst.snapshot()
+        cache = self._crew_index
+        if cache is None or cache[0] is not snapshot:
+            table = self.table
+            cumulative_marines = [0]
+            cumulative_money = [0]
+            island_marines = []
+            island_money = []
+            for _, islands in snapshot:
+                for island in islands:
+                    if table is None:
+                        marines, money = island.marines, island.money
+                    else:
+                        marines, money = table.marines[island], table.money[island]
+                    island_marines.append(marines)
+                    island_money.append(money)
+                    cumulative_marines.append(cumulative_marines[-1] + marines)
+                    cumulative_money.append(cumulative_money[-1] + math.ceil(money))
+            cache = (snapshot, (cumulative_marines, cumulative_money, island_marines, island_money))
+            self._crew_index = cache
+        return cache[1]
+
+
+    def update_island(self, island: Island, new_money: float, new_marines: int) -> None:
+        """
+        Moves the island from the bucket of its old ratio to the bucket of its new ratio,
+        removing the old bucket from the tree if it is left empty.
+
+        :complexity: Best/Worst Case O(log(N) + B) where N is the number of distinct ratios
+        and B is the number of islands sharing the island's old ratio.
+        :raises KeyError: if the island is not part of this navigator.
+        :raises TypeError: if the navigator was built from an IslandTable, see update_row.
+        :raises ZeroDivisionError: if new_money is 0. The island is not changed.
+        """
+        if self.table is not None:
+            raise TypeError("Islands of an IslandTable are updated with update_row.")
+        if self.persistent:
+            self._publish_update(island, new_money, new_marines)
+            return
 
-        if position == -1:
-            raise KeyError ("Island not found")
-        
+        # Computed first, so an island that cannot be re-keyed is left as it was.
+        new_key = new_marines/new_money
+        old_key = island.marines/island.money
+        bucket, position = self._find(old_key, island)
         island.money = new_money
         island.marines = new_marines
-    
+        self._move(old_key, bucket, position, new_key, island)
+
+    def update_row(self, row: int, new_money: float, new_marines: int) -> None:
+        """
+        update_island for a navigator built from an IslandTable: changes the row's
+        money and marines in the table and moves the row to the bucket of its new ratio.
+
+        :complexity: Best/Worst Case O(log(N) + B) where N is the number of distinct ratios
+        and B is the number of rows sharing the row's old ratio.
+        :raises IndexError: if row is not a row of the table.
+        :raises TypeError: if the navigator was not built from an IslandTable.
+        :raises OverflowError: if new_marines does not fit in the marines column.
+        :raises ZeroDivisionError: if new_money is 0.
+        The row is not changed when any of these are raised.
+        """
+        table = self.table
+        if table is None:
+            raise TypeError("Only a navigator built from an IslandTable has rows.")
+        if not 0 <= row < len(table):
+            raise IndexError("Row out of range: {0}".format(row))
+        # Converted to the column types and re-keyed first, so a value that does not fit
+        # (e.g. too many marines for array('i')) or a zero money leaves the row as it was.
+        money = array(table.money.typecode, [new_money])[0]
+        marines = array(table.marines.typecode, [new_marines])[0]
+        new_key = marines/money
+        old_key = table.marines[row]/table.money[row]
+        bucket, position = self._find(old_key, row)
+
+        table.money[row] = money
+        table.marines[row] = marines
+        self._move(old_key, bucket, position, new_key, row)
+
+    def _find(self, key: float, island: Island | int) -> tuple[list, int]:
+        """
+        Returns the bucket for key and the position of the island (or row) in it.
+
+        :complexity: O(log(N) + B) where N is the number of distinct ratios and B is the bucket size.
+        :raises KeyError: if the island is not in the bucket.
+        """
+        if key not in self.bst:
+            raise KeyError("Island not found")
+        bucket = self.bst[key]
+        for position in range(len(bucket)):
+            # Rows are compared by value, islands by identity.
+            if bucket[position] is island or (self.table is not None and bucket[position] == island):
+                return (bucket, position)
+        raise KeyError("Island not found")
+
+    def _move(self, old_key: float, bucket: list, position: int, new_key: float, island: Island | int) -> None:
+        """
+        Takes the island (or row) out of bucket, deleting the bucket if it is left
+        empty, and adds it to the bucket of new_key.
+
+        :complexity: O(log(N) + B) where N is the number of distinct ratios and B is the bucket size.
+        """
+        bucket.pop(position)
+        if len(bucket) == 0:
+            del self.bst[old_key]
+
+        if new_key not in self.bst:
+            self.bst[new_key] = [island]
+        else:
+            self.bst[new_key].append(island)
+        self._crew_index = None
+        self._crew_arrays = None
+
+    def _publish_update(self, island: Island, new_money: float, new_marines: int) -> None:
+        """
+        update_island for a persistent navigator. Nothing reachable from the current version
+        is changed: the island is copied with its new values, the buckets are copied, and the
+        new tree version is built aside and then published in one assignment.
+
+        :complexity: O(log(N) + B) where N is the number of distinct ratios and B is the
+        size of the buckets involved.
+        :raises KeyError: if the island is not part of this navigator, or is a copy that a
+        later update has replaced.
+        """
+        original, current = self._resolve(island)
+        old_key = current.marines/current.money
+        bucket, position = self._find(old_key, current)
+
+        record = copy.copy(current)
+        record.money = new_money
+        record.marines = new_marines
+
+        bst = self.bst
+        if len(bucket) == 1:
+            bst = bst.without(old_key)
+        else:
+            bst = bst.with_item(old_key, bucket[:position] + bucket[position + 1:])
+        new_key = record.marines/record.money
+        if new_key in bst:
+            bst = bst.with_item(new_key, bst[new_key] + [record])
+        else:
+            bst = bst.with_item(new_key, [record])
+        self.bst = bst
+
+        if current is not original:
+            del self._original[id(current)]
+        self._original[id(record)] = (record, original)
+        self._latest[id(original)] = (original, record)
+
+    def _resolve(self, island: Island) -> tuple[Island, Island]:
+        """
+        Returns the island originally passed in that island stands for, and its latest copy.
+        Entries keep their objects alive, so their ids cannot be reused while they are stored.
+
+        :complexity: O(1)
+        """
+        entry = self._original.get(id(island))
+        original = entry[1] if entry is not None and entry[0] is island else island
+        entry = self._latest.get(id(original))
+        if entry is not None and entry[0] is original:
+            return (original, entry[1])
+        return (original, original)
+
 
     def calculate_profitability(self, island, pirates):
         # pirate_to_marine_ratio = min( 1)
         money = min((pirates / island.marines* island.money) , island.money)
         return math.ceil(money)
+
+
+class ReadWriteLock:
+    """
+    Lets any number of readers hold the lock together, or a single writer alone.
+    Waiting writers take priority over new readers, so a steady stream of reads
+    cannot starve updates.
+    """
+
+    def __init__(self) -> None:
+        """
+        :complexity: Best/Worst Case O(1)
+        """
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    def acquire_read(self) -> None:
+        """
+        :complexity: O(1), not counting the time spent waiting.
+        """
+        with self._condition:
+            while self._writing or self._writers_waiting > 0:
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        """
+        :complexity: O(1)
+        """
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """
+        :complexity: O(1), not counting the time spent waiting.
+        """
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers > 0:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+
+    def release_write(self) -> None:
+        """
+        :complexity: O(1)
+        """
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class LatencyCounter:
+    """
+    Counts calls and their latencies. Besides the total and the maximum, latencies are
+    kept in a histogram of power-of-two microsecond buckets, so percentiles can be
+    estimated in constant memory.
+    """
+
+    BUCKETS = 32
+
+    def __init__(self) -> None:
+        """
+        :complexity: Best/Worst Case O(1)
+        """
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # histogram[i] counts the latencies below 2**i microseconds not counted before it.
+        self.histogram = [0] * self.BUCKETS
+
+    def record(self, seconds: float) -> None:
+        """
+        :complexity: O(1)
+        """
+        bucket = min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            self.histogram[bucket] += 1
+
+    def mean(self) -> float:
+        """
+        :complexity: O(1)
+        """
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def percentile(self, p: float) -> float:
+        """
+        Returns an upper bound, in seconds, on the p-th percentile latency (0 < p <= 100):
+        the top of the histogram bucket holding it, capped by the maximum seen.
+
+        :complexity: O(BUCKETS)
+        """
+        with self._lock:
+            target = math.ceil(self.count * p / 100)
+            seen = 0
+            for bucket, calls in enumerate(self.histogram):
+                seen += calls
+                if seen >= target and seen > 0:
+                    return min(2 ** bucket / 1e6, self.max)
+            return self.max
+
+
+class _PendingUpdate:
+    __slots__ = ("apply", "target", "key", "money", "marines", "done", "error")
+
+    def __init__(self, apply: Callable[[Island | int, float, int], None], target: Island | int,
+                 key: tuple, money: float, marines: int) -> None:
+        self.apply = apply
+        self.target = target
+        self.key = key
+        self.money = money
+        self.marines = marines
+        self.done = False
+        self.error = None
+
+
+class ConcurrentMode1Navigator:
+    """
+    Thread-safe wrapper around a Mode1Navigator for read-mostly use.
+
+    The queries share a ReadWriteLock and so run in parallel. update_island and
+    update_row queue their update and then compete for the write lock; whichever writer
+    gets it applies every queued update in one batch, and the others find theirs already
+    applied when their turn comes. Updates queued for the same island or row are
+    coalesced into the last one that succeeds, since they set absolute values. Each
+    method's latency, including the time spent waiting for the lock, is recorded in
+    self.latency.
+    """
+
+    def __init__(self, islands: list[Island] | IslandTable, crew: int) -> None:
+        """
+        :complexity: See Mode1Navigator.__init__.
+        """
+        self.navigator = Mode1Navigator(islands, crew)
+        self.lock = ReadWriteLock()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self.batches = 0
+        self.latency = {
+            "select_islands": LatencyCounter(),
+            "select_islands_from_crew_numbers": LatencyCounter(),
+            "update_island": LatencyCounter(),
+            "update_row": LatencyCounter(),
+        }
+
+    def select_islands(self) -> list[tuple[Island, int]]:
+        """
+        :complexity: See Mode1Navigator.select_islands.
+        """
+        start = time.perf_counter()
+        try:
+            with self.lock.read():
+                return self.navigator.select_islands()
+        finally:
+            self.latency["select_islands"].record(time.perf_counter() - start)
+
+    def select_islands_from_crew_numbers(self, crew_numbers: list[int]) -> list[float]:
+        """
+        :complexity: See Mode1Navigator.select_islands_from_crew_numbers.
+        """
+        start = time.perf_counter()
+        try:
+            with self.lock.read():
+                return self.navigator.select_islands_from_crew_numbers(crew_numbers)
+        finally:
+            self.latency["select_islands_from_crew_numbers"].record(time.perf_counter() - start)
+
+    def update_island(self, island: Island, new_money: float, new_marines: int) -> None:
+        """
+        Returns once the update has been applied, by this thread or by another writer's batch.
+
+        :complexity: O(U * (log(N) + B)) for the writer applying a batch of U updates,
+        see Mode1Navigator.update_island.
+        :raises: whatever Mode1Navigator.update_island raises for this update.
+        """
+        update = _PendingUpdate(self.navigator.update_island, island, ("island", id(island)),
+                                new_money, new_marines)
+        self._submit("update_island", update)
+
+    def update_row(self, row: int, new_money: float, new_marines: int) -> None:
+        """
+        update_island for a navigator built from an IslandTable, batched the same way.
+
+        :complexity: See update_island and Mode1Navigator.update_row.
+        :raises: whatever Mode1Navigator.update_row raises for this update.
+        """
+        update = _PendingUpdate(self.navigator.update_row, row, ("row", row), new_money, new_marines)
+        self._submit("update_row", update)
+
+    def _submit(self, name: str, update: _PendingUpdate) -> None:
+        """
+        Queues the update and returns once it has been applied, raising its error if any.
+
+        :complexity: See update_island.
+        """
+        start = time.perf_counter()
+        try:
+            with self._pending_lock:
+                self._pending.append(update)
+            with self.lock.write():
+                if not update.done:
+                    self._apply_pending()
+            if update.error is not None:
+                raise update.error
+        finally:
+            self.latency[name].record(time.perf_counter() - start)
+
+    def _apply_pending(self) -> None:
+        """
+        Applies every queued update. Of the updates queued for the same island or row,
+        the last one is applied; only if it fails is the one before it tried, and so on.
+        A failed update keeps its exception in update.error for its writer to raise.
+        Every queued update is marked done, even if applying the batch is interrupted.
+
+        :pre: the write lock is held.
+        :complexity: O(U * (log(N) + B)) where U is the number of queued updates.
+        """
+        with self._pending_lock:
+            pending = self._pending
+            self._pending = []
+
+        try:
+            groups = {}
+            for update in pending:
+                groups.setdefault(update.key, []).append(update)
+            for updates in groups.values():
+                # The navigator checks an update before changing anything, so a failed
+                # one leaves the island or row as it was for the next one to be tried.
+                for update in reversed(updates):
+                    try:
+                        update.apply(update.target, update.money, update.marines)
+                        break
+                    except Exception as error:
+                        update.error = error
+        finally:
+            for update in pending:
+                update.done = True
+            self.batches += 1
@@ -1,33 +1,192 @@
-from island import Island
+from island import Island, IslandTable
 from algorithms import binary_search
 from data_structures.bst import BinarySearchTree
-from data_structures.heap import MaxHeap
+from data_structures.heap import IndexedMaxHeap
+from typing import Iterable, Iterator
 import math
 
 class Mode2Navigator:
     """
-    Student-TODO: short paragraph as per https://edstem.org/au/courses/12108/lessons/42810/slides/294117
+    Keeps the islands that still hold money in an IndexedMaxHeap keyed by how much better
+    plundering an island is than staying home, for the crew size of the current day.
+    Each pirate takes the top of the heap. A partially plundered island has its entry
+    updated in place, and an exhausted island is removed.
+
+    Heap entries are (gain, order, island, row) tuples, where order is the position in which
+    the island was added, so ties never fall through to comparing the islands.
+    For an Island, row is None. For a row of an IslandTable, island is the table and row
+    the row index, so the island's money and marines stay in (and are updated in) the
+    table's columns without an object per row.
     """
 
     def __init__(self, n_pirates: int) -> None:
         """
-        Student-TODO: Best/Worst Case
+        :complexity: Best/Worst Case O(1)
         """
         self.n_pirates = n_pirates
+        # (order, island, row) for the islands added since the heap was last built.
         self.islands = []
+        self.heap = None
+        self.heap_crew = None
+        self.added = 0
 
-    def add_islands(self, islands: list[Island]):
+    def add_islands(self, islands: list[Island] | IslandTable):
         """
-        Student-TODO: Best/Worst Case
+        Queues the islands so the next simulated day bulk loads them into the heap.
+        The rows of an IslandTable are plundered in the table itself, and are returned
+        by the simulation as CompactIsland copies of the row at the time.
+
+        :complexity: Best/Worst Case O(I) where I is len(islands).
         """
-        raise NotImplementedError()
+        if isinstance(islands, IslandTable):
+            for row in range(len(islands)):
+                self.islands.append((self.added, islands, row))
+                self.added += 1
+            return
+        for island in islands:
+            self.islands.append((self.added, island, None))
+            self.added += 1
 
     def simulate_day(self, crew: int) -> list[tuple[Island|None, int]]:
         """
-        Student-TODO: Best/Worst Case
+        Sends each pirate, in turn, to the island that maximises their score, or
+        keeps them home when no island beats 2 gold per crew member.
+
+        :complexity best: O(P * log(N)) when no islands were added and the crew is
+        the same as on the previous day, so the heap can be reused.
+        :complexity worst: O(N + P * log(N)) when the heap has to be rebuilt first.
+        Where N is the number of islands and P is self.n_pirates.
+        """
+        return list(self.iter_simulate_day(crew))
+
+    def iter_simulate_day(self, crew: int) -> Iterator[tuple[Island|None, int]]:
+        """
+        Lazy version of simulate_day, yielding each pirate's decision as it is made.
+        The day should be fully consumed before another day is started.
+
+        :complexity: See simulate_day, spread over the yielded decisions.
+        """
+        self._prepare_heap(crew)
+        for _ in range(self.n_pirates):
+            island, sent, _ = self._send_pirate(crew)
+            yield (island, sent)
+
+    def simulate_days(self, crews: Iterable[int], aggregate: bool = False) -> Iterator[tuple]:
+        """
+        Simulates one day per crew size in crews, without materialising a day's decisions.
+
+        If aggregate is False, yields (day, island, sent) for every pirate of every day,
+        where day is the index of the day's crew size in crews.
+        If aggregate is True, yields (total_gold, islands_exhausted) once per day instead,
+        where total_gold is the sum of the pirates' scores (money received plus 2 gold per
+        crew member kept home) and islands_exhausted is the number of islands left without
+        money or marines that day.
+
+        :complexity: O(D * N + D * P * log(N)) worst case, where D is the number of days,
+        N is the number of islands and P is self.n_pirates. Memory use is O(N).
+        """
+        for day, crew in enumerate(crews):
+            self._prepare_heap(crew)
+            total_gold = 0
+            islands_exhausted = 0
+            for _ in range(self.n_pirates):
+                island, sent, received = self._send_pirate(crew)
+                if not aggregate:
+                    yield (day, island, sent)
+                    continue
+                total_gold += received + 2 * (crew - sent)
+                if island is not None and (island.marines == 0 or island.money <= 0):
+                    islands_exhausted += 1
+            if aggregate:
+                yield (total_gold, islands_exhausted)
+
+    def _prepare_heap(self, crew: int) -> None:
+        """
+        (Re)builds the heap with IndexedMaxHeap.heapify if islands were added or the gains were
+        computed for a different crew size.
+
+        :complexity: O(1) if the heap can be reused, otherwise O(N) where N is the number of islands.
+        """
+        if self.heap is not None and self.heap_crew == crew and len(self.islands) == 0:
+            return
+
+        entries = self.islands
+        if self.heap is not None:
+            for handle in self.heap.handles():
+                _, order, island, row = handle.value
+                entries.append((order, island, row))
+        self.islands = []
+        self.heap_crew = crew
+
+        if len(entries) == 0:
+            self.heap = None
+            return
+        points = [(self._gain(*self._state(island, row), crew), order, island, row) for order, island, row in entries]
+        self.heap = IndexedMaxHeap.heapify(points)
+
+    def _send_pirate(self, crew: int) -> tuple[Island|None, int, float]:
+        """
+        Sends a single pirate to the best island in the heap, updating it in place.
+        Returns the island (or None), the crew sent and the money received.
+
+        :pre: _prepare_heap(crew) has been called.
+        :complexity: O(log(N)) where N is the number of islands in the heap.
+        """
+        if self.heap is None or len(self.heap) == 0:
+            return (None, 0, 0)
+
+        best = self.heap.max_handle()
+        gain, order, island, row = best.value
+        if gain <= 0:
+            return (None, 0, 0)
+
+        money, marines = self._state(island, row)
+        sent, received = self._plunder(money, marines, crew)
+        money -= received
+        marines -= sent
+        if row is None:
+            island.money = money
+            island.marines = marines
+        else:
+            island.money[row] = money
+            island.marines[row] = marines
+        if marines > 0 and money > 0:
+            self.heap.update(best, (self._gain(money, marines, crew), order, island, row))
+        else:
+            self.heap.remove(best)
+        return (island if row is None else island[row], sent, received)
+
+    def _state(self, island: Island | IslandTable, row: int | None) -> tuple[float, int]:
+        """
+        Returns the money and marines of an island, or of a row of a table.
+
+        :complexity: O(1)
+        """
+        if row is None:
+            return (island.money, island.marines)
+        return (island.money[row], island.marines[row])
+
+    def _plunder(self, money: float, marines: int, crew: int) -> tuple[int, float]:
+        """
+        Returns the crew a pirate should send to an island with this money and these
+        marines, and the money received.
+
+        :complexity: O(1)
+        """
+        sent = min(crew, marines)
+        if sent == marines:
+            return (sent, money)
+        return (sent, money * sent / marines)
+
+    def _gain(self, money: float, marines: int, crew: int) -> float:
+        """
+        Returns how much more a pirate scores by plundering an island with this money and
+        these marines than by staying home.
+
+        :complexity: O(1)
         """
-        raise NotImplementedError()
-    
+        sent, received = self._plunder(money, marines, crew)
+        return received - 2 * sent
 
     def calculate_profitability(self, island, pirates):
         money = min((pirates / island.marines* island.money) , island.money)
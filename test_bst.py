@@ -0,0 +1,260 @@
+import math
+import sys
+import random
+from bisect import bisect_left
+from unittest import TestCase
+from ed_utils.decorators import number, visibility
+
+from data_structures.bst import (AVLTree, BinarySearchTree, BSTInOrderIterator, BSTPostOrderIterator,
+                                 BSTPreOrderIterator, bst_in_order, bst_morris_in_order, bst_post_order,
+                                 bst_pre_order, bst_reverse_in_order)
+
+class BSTTests(TestCase):
+
+    def check_avl(self, tree, current):
+        """ Checks heights, balance and sizes below current, returning its height. """
+        if current is None:
+            return 0
+        left = self.check_avl(tree, current.left)
+        right = self.check_avl(tree, current.right)
+        self.assertLessEqual(abs(left - right), 1)
+        self.assertEqual(current.height, 1 + max(left, right))
+        self.assertEqual(current.size, 1 + tree.get_size(current.left) + tree.get_size(current.right))
+        return current.height
+
+    def check_sizes(self, tree, current):
+        """ Checks every subtree size below current, returning the size of current. """
+        if current is None:
+            return 0
+        size = 1 + self.check_sizes(tree, current.left) + self.check_sizes(tree, current.right)
+        self.assertEqual(current.size, size)
+        return size
+
+    @number("3.1")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_avl_monotonic_order(self):
+        n = 1000
+        for keys in (range(n), range(n - 1, -1, -1)):
+            tree = AVLTree()
+            for key in keys:
+                tree[key] = str(key)
+            height = self.check_avl(tree, tree.root)
+            self.assertLessEqual(height, 1.45 * math.log2(n + 2))
+            self.assertEqual([node.key for node in tree], list(range(n)))
+
+            # Delete the smallest half in increasing order, then the rest in decreasing order.
+            for key in range(n // 2):
+                del tree[key]
+                if key % 100 == 0:
+                    self.check_avl(tree, tree.root)
+            self.check_avl(tree, tree.root)
+            self.assertEqual([node.key for node in tree], list(range(n // 2, n)))
+            for key in range(n - 1, n // 2 - 1, -1):
+                del tree[key]
+            self.assertTrue(tree.is_empty())
+            self.assertEqual(len(tree), 0)
+
+    @number("3.2")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_order_statistics(self):
+        random.seed(1008)
+        for cls in (BinarySearchTree, AVLTree):
+            tree = cls()
+            keys = random.sample(range(0, 1000, 2), 200)
+            for key in keys:
+                tree[key] = key
+            for key in keys[:50]:
+                del tree[key]
+            keys = sorted(keys[50:])
+            self.assertEqual(self.check_sizes(tree, tree.root), len(keys))
+
+            for k in range(len(keys)):
+                self.assertEqual(tree.kth(k).key, keys[k])
+            for k in (-1, len(keys)):
+                with self.assertRaises(IndexError):
+                    tree.kth(k)
+            for key in range(-1, 1001):
+                # Odd keys are never in the tree, even keys may be.
+                self.assertEqual(tree.rank(key), bisect_left(keys, key))
+                smaller_or_equal = [k for k in keys if k <= key]
+                larger_or_equal = [k for k in keys if k >= key]
+                floor = tree.floor(key)
+                ceiling = tree.ceiling(key)
+                self.assertEqual(None if floor is None else floor.key, smaller_or_equal[-1] if smaller_or_equal else None)
+                self.assertEqual(None if ceiling is None else ceiling.key, larger_or_equal[0] if larger_or_equal else None)
+            for lo, hi in ((-5, 2000), (100, 300), (101, 101), (300, 100)):
+                self.assertEqual([node.key for node in tree.range(lo, hi)], [k for k in keys if lo <= k <= hi])
+
+    @number("3.3")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_failed_updates_keep_sizes(self):
+        for cls in (BinarySearchTree, AVLTree):
+            tree = cls()
+            for key in [50, 25, 75, 10, 30, 60, 90, 5]:
+                tree[key] = key
+            # Both fail deep in the tree, after sizes on the way down were changed.
+            with self.assertRaises(ValueError):
+                tree[5] = "again"
+            with self.assertRaises(ValueError):
+                del tree[7]
+            with self.assertRaises(ValueError):
+                del tree[95]
+            self.assertEqual(self.check_sizes(tree, tree.root), 8)
+            self.assertEqual(len(tree), 8)
+            self.assertEqual(tree.kth(0).key, 5)
+            self.assertEqual(tree.rank(90), 7)
+
+    @number("3.4")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_sizes_after_rotations(self):
+        # Each order forces one kind of rotation at the root: LL, RR, LR and RL.
+        for keys in ([3, 2, 1], [1, 2, 3], [3, 1, 2], [1, 3, 2]):
+            tree = AVLTree()
+            for key in keys:
+                tree[key] = key
+            self.assertEqual(tree.root.key, 2)
+            self.assertEqual((tree.root.size, tree.root.left.size, tree.root.right.size), (3, 1, 1))
+        random.seed(1054)
+        tree = AVLTree()
+        keys = list(range(500))
+        random.shuffle(keys)
+        for key in keys:
+            tree[key] = key
+        for key in keys[:250]:
+            del tree[key]
+        self.check_avl(tree, tree.root)
+        self.assertEqual([tree.kth(k).key for k in range(250)], sorted(keys[250:]))
+
+    def links(self, nodes):
+        """ The children of each node, to compare tree shapes by identity. """
+        return [(node.left, node.right) for node in nodes]
+
+    @number("3.5")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_generator_traversals(self):
+        random.seed(1008)
+        for size in (0, 1, 2, 50):
+            tree = BinarySearchTree()
+            for key in random.sample(range(1000), size):
+                tree[key] = key
+            root = tree.root
+            if size > 0:
+                self.assertEqual(list(bst_pre_order(root)), list(BSTPreOrderIterator(root)))
+                self.assertEqual(list(bst_post_order(root)), list(BSTPostOrderIterator(root)))
+            in_order = list(BSTInOrderIterator(root))
+            self.assertEqual(list(bst_in_order(root)), in_order)
+            self.assertEqual(list(bst_morris_in_order(root)), in_order)
+            self.assertEqual(list(bst_reverse_in_order(root)), in_order[::-1])
+            self.assertEqual(list(reversed(tree)), in_order[::-1])
+
+    @number("3.6")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_morris_restores_tree(self):
+        tree = BinarySearchTree()
+        for key in [50, 25, 75, 10, 30, 60, 90, 5, 27, 35]:
+            tree[key] = key
+        # Collected once, since walking a tree with threads left in it would not end.
+        nodes = list(BSTPreOrderIterator(tree.root))
+        before = self.links(nodes)
+        for stop in range(10):
+            walk = bst_morris_in_order(tree.root)
+            for _ in range(stop):
+                next(walk)
+            # Part way through, some right pointers are threads back to ancestors.
+            walk.close()
+            self.assertEqual(self.links(nodes), before)
+        self.assertEqual([node.key for node in tree], [5, 10, 25, 27, 30, 35, 50, 60, 75, 90])
+
+    @number("3.7")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_skewed_tree(self):
+        # Sorted inserts make a path 5000 nodes deep, far past the default recursion limit.
+        n = 5000
+        self.assertGreater(n, sys.getrecursionlimit())
+        tree = BinarySearchTree()
+        for key in range(n):
+            tree[key] = str(key)
+        self.assertEqual(tree.root.size, n)
+        self.assertEqual(tree[n - 1], str(n - 1))
+        self.assertNotIn(n, tree)
+        with self.assertRaises(ValueError):
+            tree[n - 1] = "again"
+        self.assertEqual(tree.kth(n - 1).key, n - 1)
+
+        # Deleting from the bottom walks the whole path every time.
+        for key in range(n - 1, n // 2 - 1, -1):
+            del tree[key]
+        with self.assertRaises(ValueError):
+            del tree[n - 1]
+        self.assertEqual(len(tree), n // 2)
+        self.assertEqual(tree.root.size, n // 2)
+        self.assertEqual([node.key for node in tree], list(range(n // 2)))
+
+    @number("3.8")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_from_sorted(self):
+        for cls in (BinarySearchTree, AVLTree):
+            for pairs in ([(1, "a"), (3, "b"), (2, "c")], [(1, "a"), (2, "b"), (2, "c")]):
+                with self.assertRaises(ValueError):
+                    cls.from_sorted(pairs)
+            empty = cls.from_sorted([])
+            self.assertIsNone(empty.root)
+            self.assertEqual(len(empty), 0)
+            self.assertTrue(empty.is_empty())
+
+        # Seven keys make a perfect tree, each range rooted at its middle key.
+        tree = BinarySearchTree.from_sorted((key, str(key)) for key in range(7))
+        self.assertEqual(tree.root.key, 3)
+        self.assertEqual((tree.root.left.key, tree.root.right.key), (1, 5))
+        self.assertEqual([node.key for node in (tree.root.left.left, tree.root.left.right,
+                                                tree.root.right.left, tree.root.right.right)], [0, 2, 4, 6])
+        self.assertEqual(self.check_sizes(tree, tree.root), 7)
+        self.assertEqual(tree[4], "4")
+        self.assertEqual(tree.snapshot(), [(key, str(key)) for key in range(7)])
+
+        # A built AVL tree keeps its heights and sizes through later updates.
+        n = 1000
+        tree = AVLTree.from_sorted((key, key) for key in range(0, 2 * n, 2))
+        self.assertEqual(len(tree), n)
+        self.assertEqual(self.check_avl(tree, tree.root), math.ceil(math.log2(n + 1)))
+        random.seed(20)
+        for key in random.sample(range(1, 2 * n, 2), 300):
+            tree[key] = key
+        for key in random.sample(range(0, 2 * n, 2), 500):
+            del tree[key]
+        self.check_avl(tree, tree.root)
+        self.assertEqual(len(tree), n - 200)
+        self.assertEqual(tree.root.size, n - 200)
+        keys = [key for key, _ in tree.snapshot()]
+        self.assertEqual(keys, sorted(keys))
+
+    @number("3.9")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_snapshot_cache(self):
+        for cls in (BinarySearchTree, AVLTree):
+            tree = cls()
+            for key in [5, 2, 8, 1]:
+                tree[key] = str(key)
+            first = tree.snapshot()
+            self.assertIs(tree.snapshot(), first)
+            self.assertEqual(first, [(1, "1"), (2, "2"), (5, "5"), (8, "8")])
+
+            tree[3] = "3"
+            second = tree.snapshot()
+            self.assertIsNot(second, first)
+            self.assertEqual([key for key, _ in second], [1, 2, 3, 5, 8])
+            # The old list is left alone for whoever still holds it.
+            self.assertEqual(len(first), 4)
+
+            del tree[5]
+            third = tree.snapshot()
+            self.assertIsNot(third, second)
+            self.assertEqual([key for key, _ in third], [1, 2, 3, 8])
+
+            # Failed updates change nothing, so the cached list is still right.
+            with self.assertRaises(ValueError):
+                tree[2] = "again"
+            with self.assertRaises(ValueError):
+                del tree[4]
+            self.assertIs(tree.snapshot(), third)
+            self.assertEqual(third, [(node.key, node.item) for node in tree])
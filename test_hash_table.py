@@ -0,0 +1,293 @@
+from unittest import TestCase
+import warnings
+from ed_utils.decorators import number, visibility
+
+from data_structures.hash_table import LinearProbeTable, RobinHoodTable, TOMBSTONE
+from data_structures.referential_array import ArrayR
+from island import Island
+
+class CountingHash:
+    """ Hash function for int keys that counts how often it is called. """
+
+    def __init__(self, buckets: int) -> None:
+        self.buckets = buckets
+        self.calls = 0
+
+    def __call__(self, key: int) -> int:
+        self.calls += 1
+        return key % self.buckets
+
+class CountingArray(ArrayR):
+    """ ArrayR that counts how many slots are read. """
+
+    def __init__(self, source: ArrayR) -> None:
+        super().__init__(len(source))
+        self.copy_from(source)
+        self.reads = 0
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return super().__getitem__(index)
+
+class HashTableTests(TestCase):
+
+    def robin_hood(self, homes: dict[str, int]) -> RobinHoodTable:
+        """ Table of size 13 where each key's home position is homes[key]. """
+        return RobinHoodTable(sizes=[13, 29], hash_function=homes.__getitem__)
+
+    @number("4.1")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_stored_hash_reused(self):
+        # Few distinct hashes, so keys form long clusters.
+        counting = CountingHash(3)
+        table = LinearProbeTable(hash_function=counting)
+        for key in range(20):
+            table[key] = key
+        # Several rehashes happened, but each key was hashed once, on its insert.
+        self.assertGreater(table.table_size, 29)
+        self.assertEqual(counting.calls, 20)
+
+        # Deleting repairs the rest of the cluster without hashing the moved keys.
+        for key in range(0, 20, 2):
+            del table[key]
+        self.assertEqual(counting.calls, 30)
+        self.assertEqual(sorted(table.keys()), list(range(1, 20, 2)))
+        for key in range(1, 20, 2):
+            self.assertEqual(table[key], key)
+
+    @number("4.2")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_overriding_hash(self):
+        class ModuloTable(LinearProbeTable):
+            calls = 0
+
+            def hash(self, key):
+                ModuloTable.calls += 1
+                return key % self.table_size
+
+        for use_tombstones in (False, True):
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                table = ModuloTable(use_tombstones=use_tombstones)
+            for key in range(100):
+                table[key * 7] = key
+            self.assertGreater(table.table_size, 100)
+            # Positions come from the overridden hash, for the current size.
+            for position, entry in enumerate(table.array):
+                if entry is not None and entry is not TOMBSTONE:
+                    self.assertEqual(entry[2], entry[0] % table.table_size)
+            self.assertEqual([table[key * 7] for key in range(100)], list(range(100)))
+            for key in range(95):
+                del table[key * 7]
+            self.assertEqual(sorted(table.keys()), [key * 7 for key in range(95, 100)])
+            self.assertNotIn(7, table)
+
+        # Resizing calls the overridden hash once per entry.
+        table = ModuloTable(sizes=[5, 13])
+        table[1] = 1
+        table[2] = 2
+        ModuloTable.calls = 0
+        table[3] = 3
+        self.assertEqual(table.table_size, 13)
+        self.assertEqual(ModuloTable.calls, 4)
+
+    @number("4.3")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_tombstones(self):
+        # Every key hashes to 0, so all of them share one cluster.
+        table = LinearProbeTable(sizes=[13, 29], use_tombstones=True, max_load_factor=0.9,
+                                 hash_function=CountingHash(1))
+        for key in range(6):
+            table[key] = str(key)
+        del table[2]
+        self.assertIs(table.array[2], TOMBSTONE)
+        self.assertEqual(len(table), 5)
+
+        # Lookups probe past the tombstone, and a missing key is still missing.
+        self.assertEqual(table[4], "4")
+        self.assertNotIn(2, table)
+        self.assertEqual(sorted(table.keys()), [0, 1, 3, 4, 5])
+        self.assertEqual(sorted(table.values()), ["0", "1", "3", "4", "5"])
+        self.assertEqual(sorted(str(table).split()), ["(0,0)", "(1,1)", "(3,3)", "(4,4)", "(5,5)"])
+
+        # A new key takes the first tombstone on its probe.
+        table[6] = "6"
+        self.assertEqual(table.array[2][0], 6)
+        self.assertEqual(table.tombstone_count, 0)
+
+        # Updating an existing key past a tombstone does not use the tombstone.
+        del table[1]
+        table[5] = "five"
+        self.assertIs(table.array[1], TOMBSTONE)
+        self.assertEqual(table[5], "five")
+
+    @number("4.4")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_tombstone_compaction(self):
+        table = LinearProbeTable(sizes=[13, 29], use_tombstones=True, max_load_factor=0.9,
+                                 hash_function=CountingHash(13))
+        for key in range(11):
+            table[key] = key
+        for key in range(8):
+            del table[key]
+        # Reuses the tombstone at position 0.
+        table[13] = 13
+        self.assertEqual((len(table), table.tombstone_count), (4, 7))
+        table[11] = 11
+        self.assertEqual(table.table_size, 13)
+        # 5 live entries and 7 tombstones go over the load factor. Tombstones outnumber
+        # the live entries, so the table is compacted at the same size instead of growing.
+        table[12] = 12
+        self.assertEqual(table.table_size, 13)
+        self.assertEqual(table.tombstone_count, 0)
+        self.assertNotIn(TOMBSTONE, list(table.array))
+        self.assertEqual(sorted(table.keys()), [8, 9, 10, 11, 12, 13])
+
+    @number("4.5")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_growth_past_table_sizes(self):
+        table = LinearProbeTable(sizes=[5, 13], hash_function="builtin")
+        for key in range(100):
+            table[key] = key
+        # Primes of roughly double the previous size are appended to this table's sizes only.
+        self.assertEqual(table.TABLE_SIZES[:5], [5, 13, 29, 59, 127])
+        self.assertEqual(LinearProbeTable.TABLE_SIZES[:2], [5, 13])
+        self.assertLessEqual(len(table), table.table_size * table.max_load_factor)
+        self.assertEqual(sorted(table.values()), list(range(100)))
+
+    @number("4.6")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_max_load_factor_validation(self):
+        for load_factor in (0, 1, -0.5, 1.5):
+            with self.assertRaises(ValueError):
+                LinearProbeTable(max_load_factor=load_factor)
+        with self.assertRaises(ValueError):
+            LinearProbeTable(hash_function="md5")
+
+    @number("4.7")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_shrink_after_bulk_delete(self):
+        for use_tombstones in (False, True):
+            table = LinearProbeTable(hash_function="builtin", use_tombstones=use_tombstones)
+            for key in range(1000):
+                table[key] = key
+            grown = table.table_size
+            for key in range(990):
+                del table[key]
+            self.assertLess(table.table_size, grown)
+            # Sparse enough to shrink once more would have shrunk it already.
+            self.assertTrue(table.size_index == 0 or
+                            len(table) >= table.table_size * table.max_load_factor * table.SHRINK_RATIO)
+            self.assertEqual(sorted(table.keys()), list(range(990, 1000)))
+            for key in range(990, 1000):
+                self.assertEqual(table[key], key)
+
+    @number("4.8")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_robin_hood_displacement(self):
+        table = self.robin_hood({"a": 0, "b": 0, "c": 1, "d": 0, "e": 2, "f": 3})
+        table["a"] = 1
+        table["c"] = 3
+        # b is further from home than c at position 1, so it takes the slot and c moves on.
+        table["b"] = 2
+        self.assertEqual([table.array[position][0] for position in range(3)], ["a", "b", "c"])
+        table["e"] = 5
+        table["f"] = 6
+        self.assertEqual([table.array[position][0] for position in range(5)], ["a", "b", "c", "e", "f"])
+        self.assertEqual([table[key] for key in "abcef"], [1, 2, 3, 5, 6])
+
+        # d (home 0) would have displaced c, which is closer to home, so the probe stops
+        # there instead of running to the end of the cluster.
+        table.array = CountingArray(table.array)
+        with self.assertRaises(KeyError):
+            table["d"]
+        self.assertEqual(table.array.reads, 3)
+
+    @number("4.9")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_robin_hood_backward_shift(self):
+        table = self.robin_hood({"x": 11, "y": 12, "z": 11})
+        table["x"] = 1
+        table["y"] = 2
+        # z displaces y, which wraps around to position 0.
+        table["z"] = 3
+        self.assertEqual([table.array[position][0] for position in (11, 12, 0)], ["x", "z", "y"])
+
+        # Deleting x shifts z and then y back by one, across the end of the array.
+        del table["x"]
+        self.assertEqual(table.array[11][0], "z")
+        self.assertEqual(table.array[12][0], "y")
+        self.assertIsNone(table.array[0])
+        self.assertNotIn(TOMBSTONE, list(table.array))
+        self.assertEqual((table["z"], table["y"], len(table)), (3, 2, 2))
+
+        # An entry at its home position stops the shift.
+        del table["z"]
+        self.assertIsNone(table.array[11])
+        self.assertEqual(table.array[12][0], "y")
+
+    @number("4.10")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_robin_hood_resize(self):
+        table = RobinHoodTable(sizes=[13, 29], hash_function="builtin")
+        self.assertEqual(table.max_load_factor, 0.85)
+        for key in range(11):
+            table[key] = key
+        # 11 of 13 slots is under 0.85, the 12th entry is not.
+        self.assertEqual(table.table_size, 13)
+        table[11] = 11
+        self.assertEqual(table.table_size, 29)
+        for key in range(12, 200):
+            table[key] = key
+        self.assertLessEqual(len(table), table.table_size * 0.85)
+        for key in range(200):
+            self.assertEqual(table[key], key)
+        for key in range(190):
+            del table[key]
+        self.assertEqual(sorted(table.keys()), list(range(190, 200)))
+
+    @number("4.11")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_hash_functions(self):
+        words = ["island{0}".format(i) for i in range(200)]
+        for name in ("universal", "fnv1a", "builtin"):
+            table = LinearProbeTable(hash_function=name)
+            for i, word in enumerate(words):
+                table[word] = i
+            self.assertEqual([table[word] for word in words], list(range(200)))
+            self.assertNotIn("island200", table)
+        # Published FNV-1a test vectors.
+        table = LinearProbeTable(hash_function="fnv1a")
+        self.assertEqual(table.fnv1a_hash(""), 0xcbf29ce484222325)
+        self.assertEqual(table.fnv1a_hash("a"), 0xaf63dc4c8601ec8c)
+        self.assertEqual(table.fnv1a_hash(b"a"), table.fnv1a_hash("a"))
+
+        table = LinearProbeTable(hash_function="builtin")
+        table[(1, "a")] = 1
+        table[(1, "b")] = 2
+        self.assertEqual((table[(1, "a")], table[(1, "b")]), (1, 2))
+
+        # Islands are not hashable, but a key function can hash their fields.
+        table = LinearProbeTable(hash_function=lambda island: hash((island.name, island.money, island.marines)))
+        islands = [Island("A", 400, 100), Island("B", 300, 150), Island("C", 100, 5)]
+        for island in islands:
+            table[island] = island.name
+        self.assertEqual(table[Island("B", 300, 150)], "B")
+        self.assertNotIn(Island("B", 300, 151), table)
+
+    @number("4.12")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_probe_statistics(self):
+        homes = {"a": 0, "b": 0, "c": 1, "d": 5, "e": 12, "f": 12}
+        table = LinearProbeTable(sizes=[13, 29], hash_function=homes.__getitem__)
+        for key in "abcdef":
+            table[key] = key
+        # f wraps around from 12 and lands in position 3, after a, b and c.
+        self.assertEqual(table.array[3][0], "f")
+        statistics = table.probe_statistics()
+        # The cluster 12, 0, 1, 2, 3 wraps around the end and is counted once.
+        self.assertEqual(statistics["cluster_lengths"], {5: 1, 1: 1})
+        self.assertEqual(statistics["probe_counts"], {1: 3, 2: 2, 5: 1})
+
+        empty = LinearProbeTable(sizes=[13])
+        self.assertEqual(empty.probe_statistics(), {"cluster_lengths": {}, "probe_counts": {}})
@@ -0,0 +1,204 @@
+from unittest import TestCase
+from ed_utils.decorators import number, visibility
+
+from data_structures.heap import DaryHeap, IndexedMaxHeap, MaxHeap
+from island import Island
+import random
+from data_structures.referential_array import ArrayR
+
+class HeapTests(TestCase):
+
+    def check_heap(self, heap):
+        """ Checks the heap order and that every handle knows its index. """
+        for k in range(1, len(heap) + 1):
+            self.assertEqual(heap.the_array[k].index, k)
+            if k > 1:
+                self.assertLessEqual(heap.the_array[k].value, heap.the_array[k // 2].value)
+
+    @number("6.1")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_indexed_update(self):
+        heap = IndexedMaxHeap(10)
+        handles = {value: heap.add(value) for value in [5, 3, 8, 1, 9, 2, 7]}
+        self.assertEqual(heap.peek(), 9)
+        self.assertEqual(len(heap), 7)
+
+        # Rises to the top.
+        heap.update(handles[1], 10)
+        self.assertIs(heap.max_handle(), handles[1])
+        self.check_heap(heap)
+        # Sinks to the bottom.
+        heap.update(handles[1], 0)
+        self.assertEqual(heap.peek(), 9)
+        self.check_heap(heap)
+        self.assertEqual(heap.pop_many(7), [9, 8, 7, 5, 3, 2, 0])
+        with self.assertRaises(IndexError):
+            heap.peek()
+
+    @number("6.2")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_indexed_remove(self):
+        heap = IndexedMaxHeap(10)
+        handles = [heap.add(value) for value in [9, 8, 7, 6, 5, 1]]
+        # The last element in the array is just dropped.
+        last = heap.the_array[len(heap)]
+        self.assertEqual(heap.remove(last), last.value)
+        self.check_heap(heap)
+        # An inner element is replaced by the last one, which then moves into place.
+        self.assertEqual(heap.remove(handles[1]), 8)
+        self.check_heap(heap)
+        self.assertEqual(sorted(handle.value for handle in heap.handles()), [5, 6, 7, 9])
+
+        # Handles that left the heap, or belong to another heap, are rejected.
+        for stale in (last, handles[1], IndexedMaxHeap(1).add(3)):
+            with self.assertRaises(KeyError):
+                heap.remove(stale)
+            with self.assertRaises(KeyError):
+                heap.update(stale, 100)
+        popped = heap.max_handle()
+        self.assertEqual(heap.get_max(), 9)
+        with self.assertRaises(KeyError):
+            heap.update(popped, 1)
+        self.assertEqual(popped.index, 0)
+
+    @number("6.3")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_indexed_heapify(self):
+        heap = IndexedMaxHeap.heapify([3, 1, 4, 1, 5, 9, 2, 6])
+        self.check_heap(heap)
+        self.assertEqual(len(heap.the_array), 9)
+        self.assertEqual(heap.peek(), 9)
+
+        points = ArrayR(5)
+        points[1:5] = [2, 7, 1, 8]
+        heap = IndexedMaxHeap.heapify(points, in_place=True)
+        self.assertIs(heap.the_array, points)
+        self.check_heap(heap)
+        self.assertEqual(heap.pop_many(4), [8, 7, 2, 1])
+
+    @number("6.4")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_dary_heap_orders(self):
+        random.seed(1054)
+        values = [random.randint(0, 100) for _ in range(300)]
+        for arity in (2, 3, 4, 8):
+            for max_heap in (True, False):
+                expected = sorted(values, reverse=max_heap)
+                heap = DaryHeap(arity, max_heap=max_heap)
+                for value in values:
+                    heap.add(value)
+                # Grown from a capacity of 1.
+                self.assertGreaterEqual(len(heap.entries), 300)
+                self.assertEqual(heap.peek(), expected[0])
+                self.assertEqual([heap.pop() for _ in range(len(heap))], expected)
+
+                heap = DaryHeap.heapify(iter(values), arity, max_heap=max_heap)
+                self.assertEqual([heap.pop() for _ in range(len(heap))], expected)
+                with self.assertRaises(IndexError):
+                    heap.pop()
+                with self.assertRaises(IndexError):
+                    heap.peek()
+        with self.assertRaises(ValueError):
+            DaryHeap(1)
+
+    @number("6.5")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_dary_heap_key(self):
+        islands = [Island("A", 400, 100), Island("B", 300, 150), Island("C", 100, 5), Island("D", 350, 90)]
+        # The key is computed once per island and the islands are never compared.
+        calls = []
+        def by_marines(island):
+            calls.append(island.name)
+            return island.marines
+        heap = DaryHeap(4, key=by_marines, max_heap=False)
+        for island in islands:
+            heap.add(island)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual([heap.pop().name for _ in range(4)], ["C", "D", "A", "B"])
+
+        heap = DaryHeap.heapify(islands, 2, key=lambda island: island.money)
+        self.assertEqual([heap.pop().name for _ in range(4)], ["A", "D", "B", "C"])
+        # Equal keys never fall through to comparing the elements.
+        heap = DaryHeap.heapify([object() for _ in range(10)], 3, key=lambda _: 0)
+        self.assertEqual(len([heap.pop() for _ in range(10)]), 10)
+
+    @number("6.6")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_heapify(self):
+        heap = MaxHeap.heapify([3, 1, 4, 1, 5, 9, 2, 6])
+        # Exactly sized: slot 0 plus one slot per point.
+        self.assertEqual(len(heap.the_array), 9)
+        self.assertTrue(heap.is_full())
+        self.assertEqual(heap.pop_many(8), [9, 6, 5, 4, 3, 2, 1, 1])
+
+        heap = MaxHeap.heapify([3, 1, 4], overwrite_size=10)
+        self.assertEqual(len(heap.the_array), 11)
+        heap.add(7)
+        self.assertEqual(heap.pop_many(4), [7, 4, 3, 1])
+
+        # Any sized iterable works, not just lists and ArrayRs.
+        self.assertEqual(MaxHeap.heapify(range(5)).pop_many(5), [4, 3, 2, 1, 0])
+        self.assertEqual(MaxHeap.heapify({5, 8, 2}).pop_many(3), [8, 5, 2])
+
+    @number("6.7")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_heapify_in_place(self):
+        points = ArrayR(6)
+        points[:] = [100, 3, 8, 1, 9, 4]
+        heap = MaxHeap.heapify(points, in_place=True)
+        self.assertIs(heap.the_array, points)
+        self.assertEqual(len(heap), 5)
+        # Slot 0 is not an element, however large it is.
+        self.assertEqual(heap.pop_many(5), [9, 8, 4, 3, 1])
+
+        for cls in (MaxHeap, IndexedMaxHeap):
+            with self.assertRaises(TypeError):
+                cls.heapify([None, 3, 1], in_place=True)
+
+    @number("6.8")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_nlargest(self):
+        random.seed(19)
+        values = [random.randint(0, 20) for _ in range(60)]   # plenty of duplicates
+        heap = MaxHeap.heapify(values)
+        before = [heap.the_array[k] for k in range(1, len(heap) + 1)]
+        expected = sorted(values, reverse=True)
+        for k in (1, 2, 7, 59, 60):
+            self.assertEqual(heap.nlargest(k), expected[:k])
+        # More than there are, or none at all.
+        self.assertEqual(heap.nlargest(100), expected)
+        self.assertEqual(heap.nlargest(0), [])
+        self.assertEqual(heap.nlargest(-3), [])
+        self.assertEqual(MaxHeap(5).nlargest(3), [])
+        # The heap itself is untouched.
+        self.assertEqual(len(heap), 60)
+        self.assertEqual([heap.the_array[k] for k in range(1, len(heap) + 1)], before)
+        self.assertEqual(heap.pop_many(60), expected)
+
+        # An indexed heap reports values, not handles, and keeps its handles in place.
+        indexed = IndexedMaxHeap(len(values))
+        for value in values:
+            indexed.add(value)
+        self.assertEqual(indexed.nlargest(10), expected[:10])
+        self.assertEqual(indexed.nlargest(100), expected)
+        self.check_heap(indexed)
+        self.assertEqual(len(indexed), 60)
+
+    @number("6.9")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_pop_many(self):
+        heap = MaxHeap.heapify([4, 9, 4, 1, 7])
+        self.assertEqual(heap.pop_many(0), [])
+        self.assertEqual(heap.pop_many(-1), [])
+        self.assertEqual(heap.pop_many(3), [9, 7, 4])
+        self.assertEqual(len(heap), 2)
+        # Asking for more than are left empties the heap.
+        self.assertEqual(heap.pop_many(5), [4, 1])
+        self.assertEqual(len(heap), 0)
+        self.assertEqual(heap.pop_many(1), [])
+
+        indexed = IndexedMaxHeap(4)
+        handles = [indexed.add(value) for value in [2, 8, 5]]
+        self.assertEqual(indexed.pop_many(2), [8, 5])
+        self.assertEqual([handle.index for handle in handles], [1, 0, 0])
+        self.check_heap(indexed)
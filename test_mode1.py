@@ -1,10 +1,18 @@
-from unittest import TestCase
+from unittest import TestCase, skipIf
 from ed_utils.timeout import timeout
 from ed_utils.decorators import number, visibility
 from random_gen import RandomGen
 
-from island import Island
-from mode1 import Mode1Navigator
+from island import Island, IslandTable
+from mode1 import ConcurrentMode1Navigator, LatencyCounter, Mode1Navigator
+from threading import Thread
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class Mode1Tests(TestCase):
 
@@ -110,3 +118,318 @@ class Mode1Tests(TestCase):
         nav = Mode1Navigator(self.islands, 200)
         results = nav.select_islands_from_crew_numbers([0, 200, 500, 300, 40])
         self.assertListEqual(results, [0, 865, 1450, 1160, 240])
+
+    @number("1.7")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_crew_numbers_match_selection(self):
+        RandomGen.set_seed(1008)
+        islands = [
+            Island(f"I{i}", RandomGen.randint(1, 500), RandomGen.randint(1, 300))
+            for i in range(50)
+        ]
+        crew_numbers = [RandomGen.randint(0, 10000) for _ in range(30)]
+        results = Mode1Navigator(islands, 0).select_islands_from_crew_numbers(crew_numbers)
+        for crew, result in zip(crew_numbers, results):
+            nav = Mode1Navigator(islands, crew)
+            expected = 0
+            for island, crew_sent in nav.select_islands():
+                expected += nav.calculate_profitability(island, crew_sent)
+            self.assertEqual(result, expected)
+
+    @number("1.8")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_sorted_islands(self):
+        # Islands arriving in ratio order should not degrade the tree into a linked list.
+        islands = [Island(f"I{i}", 1000, i + 1) for i in range(5000)]
+        nav = Mode1Navigator(islands, 10)
+        self.assertLessEqual(nav.bst.root.height, 20)
+        selected = nav.select_islands()
+        self.assertEqual(selected[:4], [(islands[0], 1), (islands[1], 2), (islands[2], 3), (islands[3], 4)])
+
+    @number("1.9")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_updates_rekey_islands(self):
+        self.load_basic()
+        nav = Mode1Navigator(self.islands, 200)
+        old_key = self.islands[2].marines / self.islands[2].money
+        # Island C goes from the best ratio to the worst.
+        nav.update_island(self.islands[2], 100, 500)
+        self.assertNotIn(old_key, nav.bst)
+        self.assertEqual(len(nav.bst), 5)
+        self.assertEqual(nav.select_islands_from_crew_numbers([200, 500]), [780, 1362])
+        nav.update_island(self.islands[2], 100, 5)
+        self.assertEqual(nav.select_islands_from_crew_numbers([200, 500]), [865, 1450])
+        with self.assertRaises(KeyError):
+            nav.update_island(Island("Z", 100, 5), 100, 6)
+        # A failed update leaves the island as it was and where it was.
+        with self.assertRaises(ZeroDivisionError):
+            nav.update_island(self.islands[2], 0, 5)
+        self.assertEqual((self.islands[2].money, self.islands[2].marines), (100, 5))
+        nav.update_island(self.islands[2], 100, 500)
+        self.assertEqual(nav.select_islands_from_crew_numbers([200, 500]), [780, 1362])
+
+    @number("1.10")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @skipIf(np is None, "NumPy is not installed")
+    def test_multiple_crew_sizes_numpy(self):
+        self.load_basic()
+        nav = Mode1Navigator(self.islands, 200)
+        results = nav.select_islands_from_crew_numbers(np.array([0, 200, 500, 300, 40, 10000]))
+        self.assertIsInstance(results, np.ndarray)
+        self.assertListEqual(results.tolist(), [0, 865, 1450, 1160, 240, 1450])
+        crews = [1.5, 199.5, 0.25]
+        self.assertListEqual(nav.select_islands_from_crew_numbers(np.array(crews)).tolist(),
+                             nav.select_islands_from_crew_numbers(crews))
+
+    @number("1.11")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_island_table(self):
+        self.load_basic()
+        table = IslandTable.from_islands(self.islands)
+        nav = Mode1Navigator(table, 200)
+        self.check_solution(self.islands, 200, nav.select_islands(), 865)
+        self.assertListEqual(nav.select_islands_from_crew_numbers([0, 200, 500, 300, 40]), [0, 865, 1450, 1160, 240])
+        if np is not None:
+            self.assertListEqual(nav.select_islands_from_crew_numbers(np.array([0, 200, 500, 300, 40])).tolist(),
+                                 [0, 865, 1450, 1160, 240])
+
+        # Rows are new objects every time, so they are updated by index.
+        with self.assertRaises(TypeError):
+            nav.update_island(table[2], 100, 500)
+        with self.assertRaises(IndexError):
+            nav.update_row(5, 100, 500)
+        nav.update_row(2, 100, 500)
+        self.assertEqual((table.money[2], table.marines[2]), (100, 500))
+        self.assertEqual(nav.select_islands_from_crew_numbers([200, 500]), [780, 1362])
+        if np is not None:
+            self.assertListEqual(nav.select_islands_from_crew_numbers(np.array([200, 500])).tolist(), [780, 1362])
+        # Failed updates leave the row as it was and where it was.
+        with self.assertRaises(ZeroDivisionError):
+            nav.update_row(2, 0, 5)
+        with self.assertRaises(OverflowError):
+            nav.update_row(2, 100, 2**40)
+        self.assertEqual((table.money[2], table.marines[2]), (100, 500))
+        nav.update_row(2, 100, 5)
+        self.assertEqual(nav.select_islands_from_crew_numbers([200, 500]), [865, 1450])
+        # The navigator holds no view of the columns, so the table can still grow.
+        table.append("F", 1, 1)
+
+    @number("1.12")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_persistent_updates(self):
+        self.load_basic()
+        nav = Mode1Navigator(self.islands, 200, persistent=True)
+        pinned = nav.bst
+        keys = [key for key, _ in pinned.snapshot()]
+        nav.update_island(self.islands[2], 100, 500)
+        self.assertEqual(nav.select_islands_from_crew_numbers([200, 500]), [780, 1362])
+        # The tree the update started from is left as it was, islands included.
+        self.assertEqual([node.key for node in pinned], keys)
+        self.assertIsNot(nav.bst, pinned)
+        self.assertEqual((self.islands[2].money, self.islands[2].marines), (100, 5))
+        for key, islands in pinned.snapshot():
+            for island in islands:
+                self.assertEqual(island.marines / island.money, key)
+        self.assertEqual(pinned[0.05], [self.islands[2]])
+
+        # The copy returned by select_islands stands for the same island.
+        nav.crew = 500
+        copy_of_c = [island for island, _ in nav.select_islands() if island.name == "C"][0]
+        self.assertEqual((copy_of_c.name, copy_of_c.money, copy_of_c.marines), ("C", 100, 500))
+        nav.update_island(copy_of_c, 100, 5)
+        self.assertEqual(nav.select_islands_from_crew_numbers([200, 500]), [865, 1450])
+        # A copy replaced by a later update is stale.
+        with self.assertRaises(KeyError):
+            nav.update_island(copy_of_c, 100, 6)
+        # The island passed in still finds its latest copy.
+        nav.update_island(self.islands[2], 100, 500)
+        self.assertEqual(nav.select_islands_from_crew_numbers([200, 500]), [780, 1362])
+        with self.assertRaises(KeyError):
+            nav.update_island(Island("Z", 100, 5), 100, 6)
+
+    @number("1.13")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_concurrent_navigator(self):
+        self.load_basic()
+        nav = ConcurrentMode1Navigator(self.islands, 200)
+        results = []
+
+        def read():
+            for _ in range(50):
+                results.append(nav.select_islands_from_crew_numbers([200, 500]))
+
+        def write():
+            for _ in range(50):
+                nav.update_island(self.islands[2], 100, 500)
+                nav.update_island(self.islands[2], 100, 5)
+
+        threads = [Thread(target=read) for _ in range(4)] + [Thread(target=write) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Every read saw Island C either before or after an update, never half way.
+        for result in results:
+            self.assertIn(result, [[780, 1362], [865, 1450]])
+        self.assertEqual(nav.select_islands_from_crew_numbers([200, 500]), [865, 1450])
+        self.assertEqual(nav.latency["update_island"].count, 200)
+        self.assertEqual(nav.latency["select_islands_from_crew_numbers"].count, 201)
+        with self.assertRaises(KeyError):
+            nav.update_island(Island("Z", 100, 5), 100, 6)
+
+    @number("1.14")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_negative_crew_size(self):
+        self.load_basic()
+        nav = Mode1Navigator(self.islands, 200)
+        with self.assertRaises(ValueError):
+            nav.select_islands_from_crew_numbers([200, -1])
+        if np is not None:
+            with self.assertRaises(ValueError):
+                nav.select_islands_from_crew_numbers(np.array([200, -1]))
+
+    @number("1.15")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_persistent_concurrent_readers(self):
+        self.load_basic()
+        nav = Mode1Navigator(self.islands, 200, persistent=True)
+        done = []
+        errors = []
+
+        def write():
+            marines = 5
+            while not done:
+                marines = 500 if marines == 5 else 5
+                nav.update_island(self.islands[2], 100, marines)
+
+        def read():
+            try:
+                for _ in range(300):
+                    pinned = nav.bst
+                    # Every island of a version is under the ratio of its values in that version.
+                    for key, islands in pinned.snapshot():
+                        for island in islands:
+                            if island.marines / island.money != key:
+                                errors.append((key, island))
+                    self.assertIn(nav.select_islands_from_crew_numbers([200, 500]), [[780, 1362], [865, 1450]])
+            except AssertionError as error:
+                errors.append(error)
+            finally:
+                done.append(True)
+
+        # Switch threads as often as possible, so reads land in the middle of updates.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            writer = Thread(target=write)
+            reader = Thread(target=read)
+            writer.start()
+            reader.start()
+            reader.join()
+            writer.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+
+    @number("1.16")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout(10)
+    def test_concurrent_batches(self):
+        self.load_basic()
+        nav = ConcurrentMode1Navigator(self.islands, 200)
+        threads = []
+
+        def queue(update, *args):
+            """ Starts a writer and waits until its update is queued, so the queue order is known. """
+            outcome = []
+
+            def run():
+                try:
+                    update(*args)
+                    outcome.append(None)
+                except Exception as error:
+                    outcome.append(error)
+
+            queued = len(nav._pending)
+            thread = Thread(target=run)
+            thread.start()
+            while len(nav._pending) == queued:
+                time.sleep(0.001)
+            threads.append(thread)
+            return outcome
+
+        a, c, e = self.islands[0], self.islands[2], self.islands[4]
+        with nav.lock.write():
+            first_c = queue(nav.update_island, c, 100, 500)
+            last_c = queue(nav.update_island, c, 100, 20)
+            bad_a = queue(nav.update_island, a, 0, 100)
+            good_e = queue(nav.update_island, e, 300, 1)
+            bad_c = queue(nav.update_island, c, 0, 5)
+            missing = queue(nav.update_island, Island("Z", 100, 5), 100, 6)
+            batches = nav.batches
+        for thread in threads:
+            thread.join()
+
+        # All of them went in one batch.
+        self.assertEqual(nav.batches, batches + 1)
+        self.assertEqual(nav._pending, [])
+        # The last update of C failed, so the one before it is the one that counts.
+        self.assertIsInstance(bad_c[0], ZeroDivisionError)
+        self.assertEqual(last_c, [None])
+        self.assertEqual(first_c, [None])
+        self.assertEqual((c.money, c.marines), (100, 20))
+        # A bad update does not stop the rest of the batch.
+        self.assertIsInstance(bad_a[0], ZeroDivisionError)
+        self.assertEqual((a.money, a.marines), (400, 100))
+        self.assertEqual(good_e, [None])
+        self.assertEqual((e.money, e.marines), (300, 1))
+        self.assertIsInstance(missing[0], KeyError)
+        self.assertEqual(nav.latency["update_island"].count, 6)
+        self.assertEqual([island.name for island, _ in nav.navigator.select_islands()], ["E", "C", "A", "D"])
+
+        # A navigator over an IslandTable is updated by row, batched the same way.
+        self.load_basic()
+        table = IslandTable.from_islands(self.islands)
+        nav = ConcurrentMode1Navigator(table, 200)
+        threads = []
+        with nav.lock.write():
+            first_row = queue(nav.update_row, 2, 100, 500)
+            last_row = queue(nav.update_row, 2, 100, 400)
+            overflow = queue(nav.update_row, 3, 100, 2**40)
+            wrong_kind = queue(nav.update_island, table[1], 100, 5)
+            batches = nav.batches
+        for thread in threads:
+            thread.join()
+        self.assertEqual(nav.batches, batches + 1)
+        self.assertEqual(first_row + last_row, [None, None])
+        self.assertEqual((table.money[2], table.marines[2]), (100, 400))
+        self.assertIsInstance(overflow[0], OverflowError)
+        self.assertIsInstance(wrong_kind[0], TypeError)
+        self.assertEqual(nav.latency["update_row"].count, 3)
+        with self.assertRaises(IndexError):
+            nav.update_row(5, 100, 5)
+        nav.update_row(2, 100, 500)
+        self.assertEqual(nav.select_islands_from_crew_numbers([200, 500]), [780, 1362])
+
+    @number("1.17")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_latency_percentiles(self):
+        counter = LatencyCounter()
+        self.assertEqual(counter.percentile(50), 0.0)
+        self.assertEqual(counter.mean(), 0.0)
+        for seconds in [5e-6] * 90 + [1e-4] * 9 + [2e-3]:
+            counter.record(seconds)
+        self.assertEqual(counter.count, 100)
+        self.assertAlmostEqual(counter.mean(), (90 * 5e-6 + 9 * 1e-4 + 2e-3) / 100)
+        # Each percentile is the top of its power-of-two microsecond bucket...
+        self.assertEqual(counter.percentile(50), 8e-6)
+        self.assertEqual(counter.percentile(90), 8e-6)
+        self.assertEqual(counter.percentile(91), 128e-6)
+        self.assertEqual(counter.percentile(99), 128e-6)
+        # ...but never more than the slowest call seen.
+        self.assertEqual(counter.percentile(100), 2e-3)
+        # Anything too slow for the histogram lands in its last bucket.
+        counter.record(1e4)
+        self.assertEqual(counter.histogram[-1], 1)
+        self.assertEqual(counter.percentile(100), 2 ** (LatencyCounter.BUCKETS - 1) / 1e6)
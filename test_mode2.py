@@ -3,7 +3,7 @@ from ed_utils.timeout import timeout
 from ed_utils.decorators import number, visibility
 from random_gen import RandomGen
 
-from island import Island
+from island import Island, IslandTable
 from mode2 import Mode2Navigator
 
 class Mode2Tests(TestCase):
@@ -121,3 +121,69 @@ class Mode2Tests(TestCase):
             # Score
             score = 2 * (100 - sent_crew) + received
             self.assertEqual(score, expected)
+
+    @number("2.3")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_random_days_are_greedy(self):
+        RandomGen.set_seed(1008)
+        islands = [
+            Island(f"I{i}", RandomGen.randint(1, 500), RandomGen.randint(1, 300))
+            for i in range(40)
+        ]
+        cur_marines = {island.name: island.marines for island in islands}
+        cur_money = {island.name: island.money for island in islands}
+
+        nav = Mode2Navigator(25)
+        nav.add_islands(islands)
+        for crew in [100, 100, 30, 250]:
+            for island, sent_crew in nav.simulate_day(crew):
+                # The best score any pirate could have made at this point.
+                best = 2 * crew
+                for name in cur_money:
+                    sent = min(crew, cur_marines[name])
+                    if sent == cur_marines[name]:
+                        received = cur_money[name]
+                    else:
+                        received = cur_money[name] * sent / cur_marines[name]
+                    best = max(best, 2 * (crew - sent) + received)
+                if island is None:
+                    self.assertAlmostEqual(2 * crew, best)
+                    continue
+                money = cur_money[island.name]
+                marines = cur_marines[island.name]
+                received = min(money, money * sent_crew / marines)
+                cur_money[island.name] = money - received
+                cur_marines[island.name] = max(0, marines - sent_crew)
+                self.assertAlmostEqual(2 * (crew - sent_crew) + received, best)
+
+    @number("2.4")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_simulate_days_aggregates(self):
+        self.load_basic()
+        nav = Mode2Navigator(3)
+        nav.add_islands(self.islands)
+        days = list(nav.simulate_days([100, 100], aggregate=True))
+        # Day 1: scores 400, 370, 300 and A, D, E are exhausted (see 2.1).
+        # Day 2: C gives 290, then nothing beats staying home.
+        self.assertEqual(days, [(1070, 3), (690, 1)])
+
+        self.load_basic()
+        nav = Mode2Navigator(3)
+        nav.add_islands(self.islands)
+        decisions = nav.simulate_days([100])
+        self.assertEqual(next(decisions), (0, self.a, 100))
+        self.assertEqual([(island.name, sent) for _, island, sent in decisions], [("D", 90), ("E", 100)])
+
+    @number("2.5")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_island_table(self):
+        self.load_basic()
+        nav = Mode2Navigator(4)
+        table = IslandTable.from_islands(self.islands)
+        nav.add_islands(table)
+        results = nav.simulate_day(100)
+        self.assertEqual([(island.name, sent) for island, sent in results], [("A", 100), ("D", 90), ("E", 100), ("C", 5)])
+        # The table is plundered in place, while the islands it was built from are untouched.
+        self.assertEqual(self.a.money, 400)
+        self.assertEqual(list(table.marines), [0, 150, 0, 0, 0])
+        self.assertEqual(results[0][0].marines, 0)
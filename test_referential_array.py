@@ -0,0 +1,118 @@
+from unittest import TestCase
+from ed_utils.decorators import number, visibility
+
+import io
+import struct
+from data_structures.referential_array import ArrayF, ArrayI, ArrayR
+
+class ReferentialArrayTests(TestCase):
+
+    @number("5.1")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_slicing_and_iteration(self):
+        array = ArrayR(5)
+        self.assertEqual(list(array), [None] * 5)
+        array[1:4] = ["a", "b", "c"]
+        self.assertEqual(array[0:5], [None, "a", "b", "c", None])
+        self.assertEqual(array[2], "b")
+        # Iteration walks a snapshot, so changes made meanwhile are not seen.
+        seen = []
+        for item in array:
+            array[4] = "late"
+            seen.append(item)
+        self.assertEqual(seen, [None, "a", "b", "c", None])
+        with self.assertRaises(ValueError):
+            ArrayR(0)
+
+    @number("5.2")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_copy_from(self):
+        source = ArrayR(4)
+        source[:] = [1, 2, 3, 4]
+        array = ArrayR(6)
+        array.copy_from(source, 1, 2, 3)
+        self.assertEqual(list(array), [None, None, None, 2, 3, None])
+        # By default everything from start onwards is copied to the start.
+        array.copy_from([7, 8, 9], 1)
+        self.assertEqual(list(array), [8, 9, None, 2, 3, None])
+        array.copy_from(source)
+        self.assertEqual(list(array), [1, 2, 3, 4, 3, None])
+        for start, count, offset in ((0, 5, 0), (2, 3, 0), (0, 4, 3), (-1, 1, 0), (0, -1, 0)):
+            with self.assertRaises(ValueError):
+                array.copy_from(source, start, count, offset)
+        # A failed copy leaves the array alone.
+        self.assertEqual(list(array), [1, 2, 3, 4, 3, None])
+
+    @number("5.3")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_resize(self):
+        array = ArrayR(3)
+        array[:] = ["a", "b", "c"]
+        array.resize(5)
+        self.assertEqual(list(array), ["a", "b", "c", None, None])
+        array.resize(2)
+        self.assertEqual(list(array), ["a", "b"])
+        with self.assertRaises(ValueError):
+            array.resize(0)
+
+    @number("5.4")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_typed_arrays(self):
+        floats = ArrayF(3)
+        self.assertEqual(list(floats), [0.0, 0.0, 0.0])
+        floats[:] = [1.5, -2.0, 3.25]
+        self.assertEqual(floats.memoryview().tolist(), [1.5, -2.0, 3.25])
+        self.assertEqual(floats.memoryview().nbytes, 24)
+
+        ints = ArrayI(2)
+        ints[0] = 2**40
+        ints[1] = -7
+        self.assertEqual(struct.unpack("<2q", ints.memoryview().tobytes()), (2**40, -7))
+        ints.resize(4)
+        self.assertEqual(list(ints), [2**40, -7, 0, 0])
+
+        # Same type: one memmove. Other sources go through slicing.
+        other = ArrayI(4)
+        other.copy_from(ints, 0, 2, 2)
+        self.assertEqual(list(other), [0, 0, 2**40, -7])
+        other.copy_from([5, 6], 0, 2, 0)
+        self.assertEqual(list(other), [5, 6, 2**40, -7])
+        with self.assertRaises(ValueError):
+            other.copy_from(ints, 1, 4, 0)
+
+    @number("5.5")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_from_buffer(self):
+        buffer = bytearray(struct.pack("<3d", 1.0, 2.0, 3.0))
+        floats = ArrayF.from_buffer(buffer)
+        self.assertEqual(list(floats), [1.0, 2.0, 3.0])
+        # The memory is shared both ways.
+        floats[0] = 9.0
+        self.assertEqual(struct.unpack("<3d", buffer)[0], 9.0)
+        buffer[8:16] = struct.pack("<d", 4.0)
+        self.assertEqual(floats[1], 4.0)
+        # Resizing moves the array to memory of its own.
+        floats.resize(4)
+        floats[0] = -1.0
+        self.assertEqual(struct.unpack("<3d", buffer)[0], 9.0)
+
+        for size in (0, 12):
+            with self.assertRaises(ValueError):
+                ArrayI.from_buffer(bytearray(size))
+
+    @number("5.6")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_read_and_write(self):
+        ints = ArrayI(3)
+        ints[:] = [1, -2, 3]
+        file = io.BytesIO()
+        ints.write_to(file)
+        self.assertEqual(len(file.getvalue()), 24)
+
+        file.seek(0)
+        self.assertEqual(list(ArrayI.read_from(file, 3)), [1, -2, 3])
+        file.seek(0)
+        self.assertEqual(list(ArrayI.read_from(file, 2)), [1, -2])
+        file.seek(0)
+        with self.assertRaises(EOFError):
+            ArrayI.read_from(file, 4)